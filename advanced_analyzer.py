@@ -4,80 +4,105 @@ Checks for broken features, design issues, and functionality problems
 """
 
 import asyncio
-import json
 import re
-from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from itertools import islice
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
+from json_io import iter_json_array, dump_json
+from result_cache import ResultCache, fetch_validator
+from worker_pool import process_stream
+
 try:
+    import aiohttp
     from playwright.async_api import async_playwright, Page, Browser
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, SoupStrainer
 except ImportError:
-    print("pip install playwright beautifulsoup4")
+    print("pip install playwright beautifulsoup4 aiohttp")
     raise
 
+from context_pool import ContextPool
+
+
+# Requests the analysis never needs. Stylesheets are kept since the design
+# and contrast checks read computed styles; images are HEAD-checked separately.
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+BLOCKED_DOMAINS = ('doubleclick', 'googletagmanager', 'google-analytics', 'facebook.net', 'hotjar', 'intercom')
+
+# Sent on link/image probes; CDNs and WAFs often refuse clients without a browser User-Agent
+BROWSER_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36')
+# HEAD answers that say more about the server than the URL: retried once as GET,
+# and treated as unknown (not broken) if GET says the same
+HEAD_REFUSED = {403, 405}
+
+# Link/image statuses remembered across sites (least recently used dropped first)
+URL_STATUS_CACHE_SIZE = 10_000
+
+# Bump when checks or scoring change so cached results from older runs are ignored
+ANALYZER_VERSION = "3"
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+
+# The C-based lxml parser is several times faster than html.parser on large pages
+try:
+    import lxml  # noqa: F401
+    SOUP_PARSER = 'lxml'
+except ImportError:
+    SOUP_PARSER = 'html.parser'
+
+# Only build the tags _check_accessibility looks at (forms keep their labels as children).
+# <html> is deliberately left out: matching it would keep the whole document.
+ACCESSIBILITY_TAGS = SoupStrainer(['img', 'form', 'title'])
+
 
 @dataclass
 class BrokenFeatures:
     """Broken functionality checks"""
     # Navigation
-    broken_links: List[str] = None
-    missing_pages: List[str] = None
+    broken_links: List[str] = field(default_factory=list)
+    missing_pages: List[str] = field(default_factory=list)
     
     # Forms
-    broken_forms: List[str] = None  # Forms that don't submit
-    missing_labels: List[str] = None  # Inputs without labels
+    broken_forms: List[str] = field(default_factory=list)  # Forms that don't submit
+    missing_labels: List[str] = field(default_factory=list)  # Inputs without labels
     
     # Images
-    broken_images: List[str] = None  # 404 images
-    oversized_images: List[str] = None  # Images > 500KB
+    broken_images: List[str] = field(default_factory=list)  # 404 images
+    oversized_images: List[str] = field(default_factory=list)  # Images > 500KB
     missing_alt: int = 0
     
     # Scripts
-    console_errors: List[str] = None  # JavaScript errors
-    failed_requests: List[str] = None  # 404 CSS/JS files
-    
-    def __post_init__(self):
-        for field in ['broken_links', 'missing_pages', 'broken_forms', 
-                      'missing_labels', 'broken_images', 'oversized_images',
-                      'console_errors', 'failed_requests']:
-            if getattr(self, field) is None:
-                setattr(self, field, [])
+    console_errors: List[str] = field(default_factory=list)  # JavaScript errors
+    failed_requests: List[str] = field(default_factory=list)  # 404 CSS/JS files
 
 
 @dataclass
 class DesignIssues:
     """Design and aesthetic issues"""
     # Color
-    low_contrast_elements: List[Dict] = None  # Text with poor contrast
+    low_contrast_elements: List[Dict] = field(default_factory=list)  # Text with poor contrast
     too_many_colors: bool = False
     color_count: int = 0
     
     # Typography
     too_many_fonts: bool = False
     font_count: int = 0
-    tiny_text: List[str] = None  # Text < 12px
+    tiny_text: List[str] = field(default_factory=list)  # Text < 12px
     
     # Layout
     horizontal_scroll: bool = False  # Mobile issue
-    overlapping_elements: List[str] = None
+    overlapping_elements: List[str] = field(default_factory=list)
     cluttered_layout: bool = False  # Too many elements above fold
     
     # Images
-    blurry_images: List[str] = None  # Low resolution
-    stretched_images: List[str] = None  # Wrong aspect ratio
+    blurry_images: List[str] = field(default_factory=list)  # Low resolution
+    stretched_images: List[str] = field(default_factory=list)  # Wrong aspect ratio
     
     # Mobile
-    non_responsive_elements: List[str] = None  # Fixed widths
-    touch_targets_too_small: List[str] = None  # Buttons < 44px
-    
-    def __post_init__(self):
-        for field in ['low_contrast_elements', 'tiny_text', 'overlapping_elements',
-                      'blurry_images', 'stretched_images', 'non_responsive_elements',
-                      'touch_targets_too_small']:
-            if getattr(self, field) is None:
-                setattr(self, field, [])
+    non_responsive_elements: List[str] = field(default_factory=list)  # Fixed widths
+    touch_targets_too_small: List[str] = field(default_factory=list)  # Buttons < 44px
 
 
 @dataclass
@@ -93,19 +118,13 @@ class AdvancedScore:
     ux_score: int = 0  # User experience
     
     # Details
-    broken: BrokenFeatures = None
-    design: DesignIssues = None
+    broken: BrokenFeatures = field(default_factory=BrokenFeatures)
+    design: DesignIssues = field(default_factory=DesignIssues)
     
     # Specific issues count
     total_errors: int = 0
     total_warnings: int = 0
     
-    def __post_init__(self):
-        if self.broken is None:
-            self.broken = BrokenFeatures()
-        if self.design is None:
-            self.design = DesignIssues()
-    
     @property
     def overall_score(self) -> int:
         """Weighted overall score"""
@@ -117,55 +136,129 @@ class AdvancedScore:
         )
     
     def to_dict(self) -> Dict:
-        data = asdict(self)
+        # Shallow copies only: asdict() would deep-copy every nested list just to dump JSON
+        data = dict(vars(self))
+        data['broken'] = dict(vars(self.broken))
+        data['design'] = dict(vars(self.design))
         data['overall_score'] = self.overall_score
         return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AdvancedScore':
+        """Rebuild a score from `to_dict()` output"""
+        data = {k: v for k, v in data.items() if k != 'overall_score'}
+        data['broken'] = BrokenFeatures(**data['broken'])
+        data['design'] = DesignIssues(**data['design'])
+        return cls(**data)
 
 
 class AdvancedAnalyzer:
     """Advanced analyzer for broken features and design issues"""
     
-    def __init__(self):
-        self.browser: Optional[Browser] = None
-        self.errors: List[str] = []
-        self.warnings: List[str] = []
+    def __init__(self, concurrency: int = 8, cache_dir: Optional[str] = None,
+                 browser: Optional[Browser] = None):
+        # A browser passed in is shared (e.g. by the pipeline) and left open by close()
+        self.browser: Optional[Browser] = browser
+        self._owns_browser = browser is None
+        self._playwright = None
+        self.concurrency = concurrency
+        # Results keyed by (url, ETag/Last-Modified), so unchanged sites skip re-analysis
+        self.cache = ResultCache(cache_dir, ttl_seconds=CACHE_TTL_SECONDS) if cache_dir else None
+        # Reusable contexts, one per concurrent worker (created in init)
+        self.pool: Optional[ContextPool] = None
+        self.http: Optional[aiohttp.ClientSession] = None
+        # URL -> HEAD status task, shared across sites (CDN/widget URLs repeat a lot)
+        self._url_status: 'OrderedDict[str, asyncio.Task]' = OrderedDict()
     
     async def init(self):
         if not self.browser:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=True)
+            self._playwright = await async_playwright().start()
+            self.browser = await self._playwright.chromium.launch(headless=True)
+            self._owns_browser = True
+        if not self.pool:
+            self.pool = ContextPool(self.browser, self.concurrency, viewport={'width': 1280, 'height': 800})
+        if not self.http:
+            # Shared keep-alive pool for link/image HEAD probes across all sites
+            self.http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=5),
+                headers={'User-Agent': BROWSER_USER_AGENT}
+            )
     
     async def close(self):
-        if self.browser:
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        if self._owns_browser and self.browser:
             await self.browser.close()
+            await self._playwright.stop()
+            self.browser = None
+        if self.http:
+            await self.http.close()
+            self.http = None
     
     async def analyze_website(self, url: str, company_name: str) -> AdvancedScore:
         """Full advanced analysis"""
         await self.init()
+        
+        # Reuse the previous result if the page's validator hasn't changed
+        cache_key = None
+        if self.cache:
+            validator = await fetch_validator(self.http, url)
+            if validator:
+                cache_key = (url, validator, ANALYZER_VERSION)
+                cached = self.cache.get(cache_key)
+                if cached:
+                    score = AdvancedScore.from_dict(cached)
+                    score.company_name = company_name
+                    return score
+        
         score = AdvancedScore(url=url, company_name=company_name)
         
-        page = await self.browser.new_page(viewport={'width': 1280, 'height': 800})
+        # Abort heavy/tracker requests, remembering them so their load failures
+        # don't show up as console errors
+        blocked_urls = set()
+        
+        async def block_heavy_resources(route):
+            request = route.request
+            if request.resource_type in BLOCKED_RESOURCE_TYPES or any(d in request.url for d in BLOCKED_DOMAINS):
+                blocked_urls.add(request.url)
+                await route.abort()
+            else:
+                await route.continue_()
+        
+        # Collect console errors (per page, since sites are analyzed concurrently)
+        console_errors: List[str] = []
         
-        # Collect console errors
-        self.errors = []
-        page.on("console", lambda msg: self.errors.append(msg.text) if msg.type == "error" else None)
+        # Borrow a pooled context; each concurrent worker holds its own
+        context = await self.pool.acquire()
+        page = None
         
         try:
-            response = await page.goto(url, wait_until='networkidle', timeout=30000)
-            await page.wait_for_timeout(2000)
+            page = await context.new_page()
+            await page.route("**/*", block_heavy_resources)
+            page.on("console", lambda msg: console_errors.append(msg.text)
+                    if msg.type == "error" and msg.location.get('url') not in blocked_urls else None)
+            
+            # Analysis only reads the DOM, so don't wait for the network to go idle
+            response = await page.goto(url, wait_until='domcontentloaded', timeout=15000)
+            await self._wait_for_content(page)
             
             # Get HTML content
             html = await page.content()
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Check broken features
-            score.broken = await self._check_broken_features(page, soup, url)
+            # Parse in a worker thread so other sites' navigations and HEAD checks keep moving
+            soup = await asyncio.to_thread(BeautifulSoup, html, SOUP_PARSER, parse_only=ACCESSIBILITY_TAGS)
             
-            # Check design issues
-            score.design = await self._check_design_issues(page, soup)
+            # Check broken features and design issues concurrently: the link/image
+            # HEAD probes run while the design walk evaluates in the browser
+            score.broken, score.design = await asyncio.gather(
+                self._check_broken_features(page, url, console_errors),
+                self._check_design_issues(page)
+            )
             
-            # Check accessibility
-            score.accessibility_score = await self._check_accessibility(page, soup)
+            # Check accessibility (needs the design pass's contrast results)
+            score.accessibility_score = await self._check_accessibility(
+                page, soup, len(score.design.low_contrast_elements))
             
             # Calculate scores
             score.functionality_score = self._calc_functionality_score(score.broken)
@@ -177,147 +270,249 @@ class AdvancedAnalyzer:
             score.total_warnings = len(score.broken.missing_labels) + len(score.design.low_contrast_elements) + \
                                   len(score.design.tiny_text)
             
+            if cache_key:
+                self.cache.set(cache_key, score.to_dict())
+            
         except Exception as e:
             print(f"Error analyzing {url}: {e}")
+        finally:
+            if page:
+                await page.close()
+            await self.pool.release(context)
         
-        await page.close()
         return score
     
-    async def _check_broken_features(self, page: Page, soup: BeautifulSoup, base_url: str) -> BrokenFeatures:
+    async def _wait_for_content(self, page: Page):
+        """Give JS-rendered sites a moment to put content in the DOM"""
+        try:
+            await page.wait_for_selector('main, article, body *', timeout=3000)
+        except Exception:
+            pass  # Analyze whatever has rendered so far
+    
+    async def _check_broken_features(self, page: Page, base_url: str,
+                                     console_errors: List[str]) -> BrokenFeatures:
         """Check for broken functionality"""
         broken = BrokenFeatures()
         
-        # Check all links
-        links = soup.find_all('a', href=True)
-        for link in links[:20]:  # Check first 20 links
-            href = link['href']
-            if href.startswith('http') or href.startswith('/'):
-                full_url = urljoin(base_url, href)
-                try:
-                    response = await page.context.request.fetch(full_url, method='HEAD')
-                    if response.status >= 400:
-                        broken.broken_links.append(full_url)
-                except:
-                    pass  # Skip if can't check
+        # Read links, images and form inputs straight from the live DOM in one round-trip
+        dom = await page.evaluate("""() => {
+            const hasLabel = id => !!id && document.querySelector('label[for="' + CSS.escape(id) + '"]') !== null;
+            return {
+                links: Array.from(document.querySelectorAll('a[href]'), a => a.getAttribute('href')).slice(0, 20),
+                images: Array.from(document.querySelectorAll('img'), img => ({
+                    src: img.getAttribute('src') || '',
+                    alt: img.getAttribute('alt') || ''
+                })),
+                formInputs: Array.from(document.querySelectorAll('form input, form textarea, form select'), inp => ({
+                    name: inp.getAttribute('name') || 'unnamed',
+                    hasLabel: hasLabel(inp.id),
+                    hasAriaLabel: !!inp.getAttribute('aria-label'),
+                    hasPlaceholder: !!inp.getAttribute('placeholder')
+                }))
+            };
+        }""")
+        
+        # Collect links (first 20) and images, then HEAD them all concurrently
+        link_urls = [urljoin(base_url, href) for href in dom['links']
+                     if href.startswith('http') or href.startswith('/')]
         
-        # Check images
-        images = soup.find_all('img')
-        for img in images:
-            src = img.get('src', '')
-            if not img.get('alt'):
+        image_srcs = []
+        for img in dom['images']:
+            if not img['alt']:
                 broken.missing_alt += 1
-            if src:
-                try:
-                    response = await page.context.request.fetch(urljoin(base_url, src), method='HEAD')
-                    if response.status >= 400:
-                        broken.broken_images.append(src)
-                except:
-                    pass
+            if img['src']:
+                image_srcs.append(img['src'])
+        
+        statuses = await asyncio.gather(
+            *[self._head_status(u) for u in link_urls],
+            *[self._head_status(urljoin(base_url, src)) for src in image_srcs]
+        )
+        link_statuses, image_statuses = statuses[:len(link_urls)], statuses[len(link_urls):]
+        
+        broken.broken_links = [u for u, status in zip(link_urls, link_statuses) if status and status >= 400]
+        broken.broken_images = [src for src, status in zip(image_srcs, image_statuses) if status and status >= 400]
         
         # Check forms
-        forms = soup.find_all('form')
-        for form in forms:
-            inputs = form.find_all(['input', 'textarea', 'select'])
-            for inp in inputs:
-                if not inp.get('id') or not soup.find('label', {'for': inp.get('id')}):
-                    if not inp.get('aria-label') and not inp.get('placeholder'):
-                        broken.missing_labels.append(inp.get('name', 'unnamed'))
+        for inp in dom['formInputs']:
+            if not inp['hasLabel'] and not inp['hasAriaLabel'] and not inp['hasPlaceholder']:
+                broken.missing_labels.append(inp['name'])
         
         # Console errors
-        broken.console_errors = self.errors[:10]  # First 10 errors
+        broken.console_errors = console_errors[:10]  # First 10 errors
         
         return broken
     
-    async def _check_design_issues(self, page: Page, soup: BeautifulSoup) -> DesignIssues:
+    async def _head_status(self, url: str) -> Optional[int]:
+        """HEAD a URL once per run and return its status, or None if it can't be checked"""
+        # Cache the task rather than the result so concurrent checks of the same URL share one request
+        task = self._url_status.get(url)
+        if task is None:
+            task = self._url_status[url] = asyncio.ensure_future(self._fetch_head_status(url))
+            if len(self._url_status) > URL_STATUS_CACHE_SIZE:
+                self._url_status.popitem(last=False)
+        else:
+            self._url_status.move_to_end(url)
+        status = await task
+        if status is None and self._url_status.get(url) is task:
+            del self._url_status[url]  # Failures (timeouts etc.) are retried by the next site
+        return status
+    
+    async def _fetch_head_status(self, url: str) -> Optional[int]:
+        try:
+            async with self.http.head(url, allow_redirects=True) as response:
+                status = response.status
+            if status in HEAD_REFUSED:
+                # Only the status line is needed; the body is never read
+                async with self.http.get(url, allow_redirects=True) as response:
+                    status = response.status
+        except Exception:
+            return None  # Skip if can't check
+        return None if status in HEAD_REFUSED else status
+    
+    async def _check_design_issues(self, page: Page) -> DesignIssues:
         """Check for design/aesthetic issues"""
         design = DesignIssues()
         
-        # Check via JavaScript
+        # Check via JavaScript. Read-only single pass: rects are read in a batch,
+        # each element's computed style is resolved once, and invisible elements are skipped.
         js_results = await page.evaluate("""() => {
-            const results = {
-                colors: new Set(),
-                fonts: new Set(),
-                tinyText: [],
-                lowContrast: [],
-                fixedWidths: [],
-                smallTouchTargets: [],
-                horizontalScroll: false
+            const TEXT_TAGS = new Set(['P', 'SPAN', 'A', 'LI', 'TD', 'H1', 'H2', 'H3', 'H4', 'H5', 'H6',
+                                       'BUTTON', 'LABEL']);
+            const LAYOUT_TAGS = new Set(['DIV', 'SECTION', 'MAIN', 'HEADER', 'FOOTER', 'NAV', 'ARTICLE',
+                                         'ASIDE', 'TABLE', 'FORM', 'IMG']);
+            // Only "more than MAX" matters, so stop collecting once a count passes its cap
+            const MAX_COLORS = 6;
+            const MAX_FONTS = 3;
+            const seenColors = Object.create(null);
+            const seenFonts = Object.create(null);
+            let colorCount = 0;
+            let fontCount = 0;
+            const fixedWidths = [];
+            const lowContrast = [];
+            let tinyTextCount = 0;
+            
+            // WCAG 2.1 relative luminance / contrast ratio
+            const parseRgb = c => {
+                const m = c.match(/rgba?\\(([^)]+)\\)/);
+                if (!m) return null;
+                const [r, g, b, a = 1] = m[1].split(',').map(parseFloat);
+                return {r, g, b, a};
+            };
+            const luminance = ({r, g, b}) => {
+                const lin = v => {
+                    const c = v / 255;
+                    return c <= 0.03928 ? c / 12.92 : ((c + 0.055) / 1.055) ** 2.4;
+                };
+                return 0.2126 * lin(r) + 0.7152 * lin(g) + 0.0722 * lin(b);
+            };
+            const contrastRatio = (fg, bg) => {
+                const l1 = luminance(fg), l2 = luminance(bg);
+                return (Math.max(l1, l2) + 0.05) / (Math.min(l1, l2) + 0.05);
             };
+            // Effective background: nearest ancestor with a non-transparent background (memoized)
+            const bgCache = new Map();
+            const effectiveBg = el => {
+                if (!el || el.nodeType !== 1) return {r: 255, g: 255, b: 255, a: 1};
+                if (bgCache.has(el)) return bgCache.get(el);
+                const bg = parseRgb(window.getComputedStyle(el).backgroundColor);
+                const result = bg && bg.a > 0 ? bg : effectiveBg(el.parentElement);
+                bgCache.set(el, result);
+                return result;
+            };
+            const hasOwnText = el => Array.from(el.childNodes)
+                .some(n => n.nodeType === 3 && n.textContent.trim());
             
-            // Get all elements
-            const allElements = document.querySelectorAll('*');
+            // Touch targets only need buttons and links; read all their rects up front
+            const targets = Array.from(document.querySelectorAll('button, a'))
+                .filter(el => el.offsetParent !== null);
+            const rects = targets.map(el => el.getBoundingClientRect());
+            const smallTouchTargets = [];
+            targets.forEach((el, i) => {
+                if (rects[i].width < 44 || rects[i].height < 44) {
+                    smallTouchTargets.push(el.textContent?.substring(0, 20) || el.tagName);
+                }
+            });
             
-            allElements.forEach(el => {
+            for (const el of document.body.querySelectorAll('*')) {
+                if (el.offsetParent === null) continue;
                 const style = window.getComputedStyle(el);
+                const tag = el.tagName;
                 
-                // Collect colors
-                results.colors.add(style.color);
-                results.colors.add(style.backgroundColor);
-                
-                // Collect fonts
-                results.fonts.add(style.fontFamily);
-                
-                // Check font size
-                const fontSize = parseInt(style.fontSize);
-                if (fontSize < 12) {
-                    results.tinyText.push(el.tagName + (el.className ? '.' + el.className : ''));
+                // Collect colors and fonts
+                if (colorCount <= MAX_COLORS) {
+                    for (const c of [style.color, style.backgroundColor]) {
+                        if (!seenColors[c]) { seenColors[c] = true; colorCount++; }
+                    }
                 }
-                
-                // Check contrast (simplified)
-                const color = style.color;
-                const bg = style.backgroundColor;
-                if (color.includes('rgb') && (bg.includes('255') || bg.includes('transparent'))) {
-                    // Potentially low contrast
+                if (fontCount <= MAX_FONTS && !seenFonts[style.fontFamily]) {
+                    seenFonts[style.fontFamily] = true;
+                    fontCount++;
                 }
                 
-                // Check fixed widths
-                if (style.width.includes('px') && !style.width.includes('%')) {
-                    const width = parseInt(style.width);
-                    if (width > 400) {
-                        results.fixedWidths.push(el.tagName);
+                if (TEXT_TAGS.has(tag)) {
+                    // Check font size on text-bearing elements
+                    const fontSize = parseFloat(style.fontSize);
+                    if (fontSize < 12) {
+                        tinyTextCount++;
+                    }
+                    
+                    // Check contrast: AA needs 4.5:1 for body text, 3:1 for large text
+                    const fg = parseRgb(style.color);
+                    if (fg && hasOwnText(el)) {
+                        const ratio = contrastRatio(fg, effectiveBg(el));
+                        const large = fontSize >= 24 || (fontSize >= 18.66 && parseInt(style.fontWeight) >= 700);
+                        if (ratio < (large ? 3 : 4.5)) {
+                            const selector = tag.toLowerCase() + (el.id ? '#' + el.id :
+                                (typeof el.className === 'string' && el.className.trim()
+                                    ? '.' + el.className.trim().split(/\\s+/)[0] : ''));
+                            lowContrast.push({selector: selector, ratio: Math.round(ratio * 100) / 100});
+                        }
                     }
                 }
                 
-                // Check touch target size
-                const rect = el.getBoundingClientRect();
-                if ((el.tagName === 'BUTTON' || el.tagName === 'A') && 
-                    (rect.width < 44 || rect.height < 44)) {
-                    results.smallTouchTargets.push(el.textContent?.substring(0, 20) || el.tagName);
+                // Check fixed widths on layout elements
+                if (LAYOUT_TAGS.has(tag)) {
+                    const width = style.width;
+                    if (width.endsWith('px') && parseInt(width) > 400) {
+                        fixedWidths.push(tag);
+                    }
                 }
-            });
-            
-            // Check for horizontal scroll
-            results.horizontalScroll = document.documentElement.scrollWidth > window.innerWidth;
+            }
             
             return {
-                colorCount: results.colors.size,
-                fontCount: results.fonts.size,
-                tinyTextCount: results.tinyText.length,
-                horizontalScroll: results.horizontalScroll,
-                smallTouchTargets: results.smallTouchTargets.slice(0, 5)
+                colorCount: colorCount,
+                fontCount: fontCount,
+                tinyTextCount: tinyTextCount,
+                horizontalScroll: document.documentElement.scrollWidth > window.innerWidth,
+                smallTouchTargets: smallTouchTargets.slice(0, 5),
+                lowContrast: lowContrast.slice(0, 10)
             };
         }""")
         
+        # Counts are capped just past the limits in the JS, so these read as "at least"
         design.color_count = js_results['colorCount']
         design.too_many_colors = design.color_count > 6
         design.font_count = js_results['fontCount']
         design.too_many_fonts = design.font_count > 3
         design.horizontal_scroll = js_results['horizontalScroll']
         design.touch_targets_too_small = js_results['smallTouchTargets']
+        design.low_contrast_elements = js_results['lowContrast']
         
         return design
     
-    async def _check_accessibility(self, page: Page, soup: BeautifulSoup) -> int:
+    async def _check_accessibility(self, page: Page, soup: BeautifulSoup, low_contrast_count: int = 0) -> int:
         """Check accessibility and return score (0-100)"""
         issues = 0
+        # Read from the live DOM since the strained soup has no <html> element
+        lang = await page.evaluate("() => document.documentElement.getAttribute('lang')")
         
         # Check for common accessibility issues
         checks = {
             'missing_alt': len(soup.find_all('img', alt=False)),
             'missing_labels': len([f for f in soup.find_all('form') if not f.find('label')]),
-            'no_lang_attr': 1 if not soup.html.get('lang') else 0,
+            'no_lang_attr': 1 if not lang else 0,
             'missing_title': 1 if not soup.title else 0,
-            'low_contrast_risk': 0,  # Would need actual contrast calculation
+            'low_contrast_risk': low_contrast_count,  # WCAG AA failures from _check_design_issues
         }
         
         issues = sum(checks.values())
@@ -361,50 +556,62 @@ class AdvancedAnalyzer:
         return max(0, score)
 
 
-async def run_advanced_analysis(input_json: str, output_json: str, limit: int = None):
-    """Run advanced analysis on companies"""
+async def run_advanced_analysis(input_json: str, output_json: str, limit: int = None,
+                                concurrency: int = 8, cache_dir: Optional[str] = None,
+                                browser: Optional[Browser] = None):
+    """Run advanced analysis on companies, `concurrency` sites at a time.
+    
+    With `cache_dir` (e.g. ".analyze_cache"), results are cached there and reused
+    on later runs for sites whose ETag/Last-Modified hasn't changed. Pass
+    `browser` to reuse an already-running browser instead of launching one.
+    """
     
-    with open(input_json, 'r', encoding='utf-8') as f:
-        companies = json.load(f)
+    # Stream companies so the first sites start loading while the rest is still being parsed
+    companies = iter_json_array(input_json)
     
     if limit:
-        companies = companies[:limit]
+        companies = islice(companies, limit)
     
-    analyzer = AdvancedAnalyzer()
-    results = []
+    analyzer = AdvancedAnalyzer(concurrency=concurrency, cache_dir=cache_dir, browser=browser)
+    await analyzer.init()
     
-    print(f"Advanced analysis of {len(companies)} websites...\n")
+    print(f"Advanced analysis of websites from {input_json}...\n")
     
-    for i, company in enumerate(companies, 1):
+    async def analyze_one(i: int, company: Dict) -> Optional[Dict]:
         url = company.get('website', '')
         if not url or not url.startswith('http'):
-            continue
-        
-        print(f"[{i}/{len(companies)}] Analyzing {company['title']}...")
+            return None
         
+        print(f"[{i}] Analyzing {company['title']}...")
         try:
             score = await analyzer.analyze_website(url, company['title'])
-            results.append(score.to_dict())
-            
-            print(f"    Overall: {score.overall_score}/100")
-            print(f"    Functionality: {score.functionality_score}/100")
-            print(f"    Design: {score.design_score}/100")
-            print(f"    Accessibility: {score.accessibility_score}/100")
-            print(f"    Errors: {score.total_errors}, Warnings: {score.total_warnings}")
-            
-            if score.broken.broken_links:
-                print(f"    Broken links: {len(score.broken.broken_links)}")
-            if score.design.horizontal_scroll:
-                print(f"    Has horizontal scroll (mobile issue)")
-                
         except Exception as e:
-            print(f"    Error: {e}")
+            print(f"    [{i}] Error: {e}")
+            return None
+        
+        # Print each report as one block so concurrent output doesn't interleave
+        lines = [
+            f"[{i}] {company['title']}",
+            f"    Overall: {score.overall_score}/100",
+            f"    Functionality: {score.functionality_score}/100",
+            f"    Design: {score.design_score}/100",
+            f"    Accessibility: {score.accessibility_score}/100",
+            f"    Errors: {score.total_errors}, Warnings: {score.total_warnings}",
+        ]
+        if score.broken.broken_links:
+            lines.append(f"    Broken links: {len(score.broken.broken_links)}")
+        if score.design.horizontal_scroll:
+            lines.append(f"    Has horizontal scroll (mobile issue)")
+        print("\n".join(lines))
+        
+        return score.to_dict()
+    
+    results = await process_stream(companies, analyze_one, concurrency)
     
     await analyzer.close()
     
     # Save results
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    dump_json(results, output_json)
     
     print(f"\nResults saved to {output_json}")
     
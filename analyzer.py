@@ -4,18 +4,123 @@ Scores websites on key functionalities using Playwright
 """
 
 import asyncio
-import json
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional
+from dataclasses import dataclass
+from itertools import islice
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
 import re
+import sys
+
+from json_io import iter_json_array, iter_analyzed, dump_json, dumps_line
+from result_cache import ResultCache
+from worker_pool import process_stream
 
 try:
-    from playwright.async_api import async_playwright, Page, Browser
+    from playwright.async_api import async_playwright, Page, Browser, Route
 except ImportError:
     print("Playwright not installed. Run: pip install playwright && playwright install")
     raise
 
+from context_pool import ContextPool
+
+try:
+    import ahocorasick  # pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Bump when checks or scoring change so cached results from older runs are ignored
+ANALYZER_VERSION = "2"
+
+# HEAD answers that mean the site is gone, not just unhappy with HEAD or bots
+DEAD_STATUSES = {404, 410}
+
+
+class SiteUnreachable(Exception):
+    """The pre-flight HEAD showed the site is down, so the browser was never opened"""
+
+
+# Compiled once at import; these run against every analyzed page
+_GENERIC_PHONE_RE = re.compile(r'\+\d[\d\s\-\(\)]{7,20}')
+_EMAIL_RE = re.compile(r'[\w.-]+@[\w.-]+\.\w+')
+_PHONE_PATTERNS = [re.compile(p) for p in (
+    r'\+39\s?\d{2,3}[\s\-]?\d{3}[\s\-]?\d{4}',  # Italian
+    r'\+\d[\d\s\-\(\)]{7,15}',  # General international
+    r'\(\d{3}\)\s?\d{3}[\s\-]?\d{4}',  # US format
+)]
+# Italian address patterns (Via/Viale/Piazza)
+_ADDRESS_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'Via\s+[\w\s]+,?\s*\d+[^.\n]*(?:Rome|Italy)',
+    r'Viale\s+[\w\s]+,?\s*\d+[^.\n]*',
+    r'Piazza\s+[\w\s]+,?\s*\d+[^.\n]*',
+)]
+
+
+def _keyword_matcher(keywords: List[str]):
+    """Build a single-pass `text -> bool` matcher for a keyword list.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+    a compiled regex alternation. Either way the text is scanned once instead
+    of once per keyword.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for kw in keywords:
+            automaton.add_word(kw, kw)
+        automaton.make_automaton()
+        return lambda text: next(automaton.iter(text), None) is not None
+    pattern = re.compile('|'.join(re.escape(kw) for kw in keywords))
+    return lambda text: pattern.search(text) is not None
+
+
+# Requests the analysis never needs (it reads HTML and text, not pixels);
+# aborting them keeps ad/tracker-heavy sites from stalling the page load
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+BLOCKED_DOMAINS = ('doubleclick', 'googletagmanager', 'google-analytics', 'facebook.net', 'hotjar', 'intercom')
+
+
+async def _block_heavy_resources(route: Route):
+    """page.route handler that aborts media and tracker requests"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(d in request.url for d in BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _count_at_least(text: str, sub: str, n: int) -> bool:
+    """True if `sub` occurs at least `n` times in `text` (stops scanning at the n-th match)"""
+    i = 0
+    for _ in range(n):
+        i = text.find(sub, i)
+        if i < 0:
+            return False
+        i += len(sub)
+    return True
+
+
+# Keyword matchers (all keywords lowercase, matched against lowercased text)
+_HAS_BOOKING = _keyword_matcher(['book now', 'add to cart', 'checkout', 'availability', 'calendar',
+                                 'select date', 'choose date', 'reserve', 'booking form'])
+_HAS_PAYMENT = _keyword_matcher(['stripe', 'paypal', 'credit card', 'payment', 'checkout',
+                                 'mastercard', 'visa', 'american express'])
+_HAS_LIVE_CHAT = _keyword_matcher(['tidio', 'intercom', 'zendesk', 'livechat', 'tawk', 'chatwoot',
+                                   'crisp', 'hubspot', 'drift', 'chat widget'])
+_HAS_ADDRESS = _keyword_matcher(['via ', 'street', 'avenue', 'address', 'rome', 'italy'])
+_HAS_SOCIAL = _keyword_matcher(['facebook.com', 'instagram.com', 'twitter.com', 'linkedin.com'])
+_HAS_TOURS = _keyword_matcher(['tour', 'tickets', 'book', 'experience'])
+_HAS_REVIEWS = _keyword_matcher(['review', 'testimonial', 'rating', 'tripadvisor', 'google'])
+
 
 @dataclass
 class TourWebsiteScore:
@@ -56,29 +161,7 @@ class TourWebsiteScore:
     
     @property
     def total_score(self) -> int:
-        score = 0
-        # Core Functionality
-        score += 10 if self.has_online_booking else 0
-        score += 10 if self.has_payment_system else 0
-        score += 5 if self.has_contact_form else 0
-        score += 5 if self.has_live_chat else 0
-        score += 5 if self.has_reviews else 0
-        score += 5 if self.has_faq else 0
-        # Content
-        score += 10 if self.has_tour_listings else 0
-        score += 10 if self.has_pricing else 0
-        score += 5 if self.has_descriptions else 0
-        score += 5 if self.has_photos else 0
-        # Technical
-        score += 10 if self.mobile_friendly else 0
-        score += 5 if self.ssl_secure else 0
-        score += 5 if self.fast_loading else 0
-        # Trust
-        score += 3 if self.has_phone else 0
-        score += 3 if self.has_email else 0
-        score += 2 if self.has_address else 0
-        score += 2 if self.has_social_links else 0
-        return score
+        return sum(points for name, points in SCORE_WEIGHTS.items() if getattr(self, name))
     
     @property
     def grade(self) -> str:
@@ -96,83 +179,179 @@ class TourWebsiteScore:
             return "F"
     
     def to_dict(self) -> Dict:
-        data = asdict(self)
+        # All fields are scalars, so a shallow copy is enough (asdict() deep-copies)
+        data = dict(vars(self))
         data['total_score'] = self.total_score
         data['grade'] = self.grade
         return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TourWebsiteScore':
+        """Rebuild a score from `to_dict()` output"""
+        return cls(**{k: v for k, v in data.items() if k not in ('total_score', 'grade')})
+
+
+# Points per check, summing to 100; `aggregate_scores` accepts overrides (e.g. config scoring_weights)
+SCORE_WEIGHTS = {
+    # Core Functionality
+    'has_online_booking': 10, 'has_payment_system': 10, 'has_contact_form': 5,
+    'has_live_chat': 5, 'has_reviews': 5, 'has_faq': 5,
+    # Content
+    'has_tour_listings': 10, 'has_pricing': 10, 'has_descriptions': 5, 'has_photos': 5,
+    # Technical
+    'mobile_friendly': 10, 'ssl_secure': 5, 'fast_loading': 5,
+    # Trust
+    'has_phone': 3, 'has_email': 3, 'has_address': 2, 'has_social_links': 2,
+}
+
+
+def aggregate_scores(results_path: str, weights: Optional[Dict[str, float]] = None) -> Tuple[List[Dict], List[float]]:
+    """Score saved analysis results with `weights` and rank them, best first.
+    
+    `weights` overrides points per check; keys may omit the `has_` prefix, as in
+    config.json's scoring_weights. Returns (results, totals) in ranked order.
+    Failed sites (error records) are left out.
+    """
+    merged = dict(SCORE_WEIGHTS)
+    for key, points in (weights or {}).items():
+        merged[key if key in SCORE_WEIGHTS else f'has_{key}'] = points
+    names = [name for name in merged if name in SCORE_WEIGHTS]
+    
+    results = list(iter_analyzed(results_path))
+    if not results:
+        return [], []
+    
+    if np is not None:
+        # One (sites x checks) matrix, then a single matrix-vector product
+        checks = np.array([[bool(r.get(name)) for name in names] for r in results], dtype=np.float32)
+        totals = checks @ np.array([merged[name] for name in names], dtype=np.float32)
+        order = np.argsort(-totals, kind='stable')
+        return [results[i] for i in order], totals[order].tolist()
+    
+    totals = [sum(merged[name] for name in names if r.get(name)) for r in results]
+    order = sorted(range(len(results)), key=lambda i: -totals[i])
+    return [results[i] for i in order], [totals[i] for i in order]
 
 
 class TourWebsiteAnalyzer:
     """Analyzes tour websites for functionality and extracts key info"""
     
-    def __init__(self):
-        self.browser: Optional[Browser] = None
+    def __init__(self, concurrency: int = 8, browser: Optional[Browser] = None,
+                 cache_dir: Optional[str] = None, cache_ttl_days: float = 7):
+        # A browser passed in is shared (e.g. by the pipeline) and left open by close()
+        self.browser: Optional[Browser] = browser
+        self._owns_browser = browser is None
+        self._playwright = None
+        self.concurrency = concurrency
+        # Reusable contexts, one per concurrent worker (created in init)
+        self.pool: Optional[ContextPool] = None
+        # Successful results keyed by (url, validator, ANALYZER_VERSION), so reruns skip known sites
+        self.cache = ResultCache(cache_dir, ttl_seconds=cache_ttl_days * 24 * 3600) if cache_dir else None
+        self.http = None  # Pre-flight HEADs (liveness + cache validator)
         
     async def init(self):
-        """Initialize browser"""
+        """Initialize browser (unless one was shared in) and context pool"""
         if not self.browser:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=True)
+            self._playwright = await async_playwright().start()
+            self.browser = await self._playwright.chromium.launch(headless=True)
+            self._owns_browser = True
+        if not self.pool:
+            self.pool = ContextPool(self.browser, self.concurrency,
+                                    setup=lambda context: context.route("**/*", _block_heavy_resources),
+                                    viewport={'width': 1280, 'height': 800})
+        if aiohttp and not self.http:
+            self.http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
     
     async def close(self):
-        """Close browser"""
-        if self.browser:
+        """Close the context pool, and the browser if we launched it"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        if self._owns_browser and self.browser:
             await self.browser.close()
+            await self._playwright.stop()
             self.browser = None
+        if self.http:
+            await self.http.close()
+            self.http = None
     
     async def analyze_website(self, url: str, company_name: str) -> TourWebsiteScore:
         """Analyze a single website"""
-        if not self.browser:
+        if not self.pool:
             await self.init()
+        
+        # Dead sites fail here in a few seconds instead of using the whole navigation timeout
+        validator = await self._probe(url) if self.http else None
+        
+        # An ETag/Last-Modified change invalidates the cached result before its TTL does
+        if self.cache:
+            cache_key = (url, validator or '', ANALYZER_VERSION)
+            cached = self.cache.get(cache_key)
+            if cached:
+                score = TourWebsiteScore.from_dict(cached)
+                score.company_name = company_name
+                return score
             
         score = TourWebsiteScore(url=url, company_name=company_name)
         
         # Check SSL
         score.ssl_secure = url.startswith('https://')
         
+        # Borrow a pooled context; each concurrent worker holds its own
+        context = await self.pool.acquire()
+        page = None
+        
         try:
-            page = await self.browser.new_page(viewport={'width': 1280, 'height': 800})
+            page = await context.new_page()
             
-            # Set timeout for slow sites
-            response = await page.goto(url, wait_until='networkidle', timeout=30000)
+            # Analysis only reads the DOM, so don't wait for the network to go idle
+            response = await page.goto(url, wait_until='domcontentloaded', timeout=15000)
+            await self._wait_for_content(page)
             
-            # Check loading speed
+            # Check loading speed (navigation start -> DOM ready)
             if response:
                 timing = await page.evaluate("""() => {
                     const nav = performance.getEntriesByType('navigation')[0];
-                    return nav ? nav.loadEventEnd - nav.loadEventStart : 9999;
+                    return nav ? nav.domContentLoadedEventEnd : 9999;
                 }""")
                 score.fast_loading = timing < 3000  # Under 3 seconds
             
             # Get page content
             content = await page.content()
             text_content = await page.evaluate("() => document.body.innerText")
+            # Lowercase each once; every check below reuses these
+            content_lower = content.lower()
             text_lower = text_content.lower()
             
             # Check for booking functionality
-            score.has_online_booking = await self._check_booking(page, content)
-            score.has_payment_system = self._check_payment(content)
+            score.has_online_booking = await self._check_booking(page, content_lower)
+            score.has_payment_system = self._check_payment(content_lower)
             
             # Check contact features
             score.has_contact_form = 'contact' in text_lower and ('form' in text_lower or '<form' in content)
-            score.has_live_chat = self._check_live_chat(content)
-            score.has_phone = bool(re.search(r'\+\d[\d\s\-\(\)]{7,20}', text_content))
-            score.has_email = bool(re.search(r'[\w.-]+@[\w.-]+\.\w+', text_content))
-            score.has_address = any(word in text_lower for word in ['via ', 'street', 'avenue', 'address', 'rome', 'italy'])
-            score.has_social_links = any(social in content.lower() for social in ['facebook.com', 'instagram.com', 'twitter.com', 'linkedin.com'])
+            score.has_live_chat = self._check_live_chat(content_lower)
+            score.has_phone = bool(_GENERIC_PHONE_RE.search(text_content))
+            score.has_email = bool(_EMAIL_RE.search(text_content))
+            score.has_address = _HAS_ADDRESS(text_lower)
+            score.has_social_links = _HAS_SOCIAL(content_lower)
             
             # Check content
-            score.has_tour_listings = any(word in text_lower for word in ['tour', 'tickets', 'book', 'experience'])
+            score.has_tour_listings = _HAS_TOURS(text_lower)
             score.has_pricing = '€' in text_content or 'price' in text_lower or 'from' in text_lower
             score.has_descriptions = len(text_content) > 500
-            score.has_photos = '<img' in content and content.count('<img') > 3
+            score.has_photos = _count_at_least(content, '<img', 4)
             
             # Check reviews and FAQ
-            score.has_reviews = any(word in text_lower for word in ['review', 'testimonial', 'rating', 'tripadvisor', 'google'])
+            score.has_reviews = _HAS_REVIEWS(text_lower)
             score.has_faq = 'faq' in text_lower or 'frequently asked' in text_lower
             
-            # Check mobile friendly (viewport meta)
-            score.mobile_friendly = 'viewport' in content.lower() and 'width=device-width' in content.lower()
+            # Check mobile friendly (viewport meta lives in <head>, so only scan that)
+            head_end = content_lower.find('</head>')
+            head_lower = content_lower[:head_end] if head_end != -1 else content_lower[:8192]
+            score.mobile_friendly = 'viewport' in head_lower and 'width=device-width' in head_lower
             
             # Extract contact info
             score.extracted_phone = self._extract_phone(text_content)
@@ -180,61 +359,69 @@ class TourWebsiteAnalyzer:
             score.extracted_address = self._extract_address(text_content)
             score.extracted_description = self._extract_description(text_content)
             
-            await page.close()
+            if self.cache:
+                self.cache.set(cache_key, score.to_dict())
             
         except Exception as e:
             print(f"Error analyzing {url}: {e}")
+        finally:
+            if page:
+                await page.close()
+            await self.pool.release(context)
             
         return score
     
-    async def _check_booking(self, page: Page, content: str) -> bool:
-        """Check if site has online booking capability"""
-        booking_keywords = ['book now', 'add to cart', 'checkout', 'availability', 'calendar', 
-                           'select date', 'choose date', 'reserve', 'booking form']
-        content_lower = content.lower()
-        return any(kw in content_lower for kw in booking_keywords)
-    
-    def _check_payment(self, content: str) -> bool:
-        """Check for payment system indicators"""
-        payment_keywords = ['stripe', 'paypal', 'credit card', 'payment', 'checkout', 
-                           'mastercard', 'visa', 'american express']
-        return any(kw in content.lower() for kw in payment_keywords)
-    
-    def _check_live_chat(self, content: str) -> bool:
-        """Check for live chat widgets"""
-        chat_indicators = ['tidio', 'intercom', 'zendesk', 'livechat', 'tawk', 'chatwoot',
-                          'crisp', 'hubspot', 'drift', 'chat widget']
-        return any(ind in content.lower() for ind in chat_indicators)
+    async def _probe(self, url: str) -> Optional[str]:
+        """HEAD the site and return its ETag/Last-Modified; raise SiteUnreachable if it is down"""
+        try:
+            async with self.http.head(url, allow_redirects=True) as response:
+                if response.status in DEAD_STATUSES:
+                    raise SiteUnreachable(f"HTTP {response.status}")
+                if response.status >= 400:
+                    return None  # HEAD refused (403/405 etc.); let the browser decide
+                return response.headers.get('ETag') or response.headers.get('Last-Modified')
+        except aiohttp.ClientConnectorError as e:
+            raise SiteUnreachable(f"cannot connect: {e}") from e
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            return None  # Slow or HEAD misbehaved; let the browser decide
+    
+    async def _wait_for_content(self, page: Page):
+        """Give JS-rendered sites a moment to put content in the DOM"""
+        try:
+            await page.wait_for_selector('main, article, body *', timeout=3000)
+        except Exception:
+            pass  # Analyze whatever has rendered so far
+    
+    async def _check_booking(self, page: Page, content_lower: str) -> bool:
+        """Check if site has online booking capability (expects lowercased HTML)"""
+        return _HAS_BOOKING(content_lower)
+    
+    def _check_payment(self, content_lower: str) -> bool:
+        """Check for payment system indicators (expects lowercased HTML)"""
+        return _HAS_PAYMENT(content_lower)
+    
+    def _check_live_chat(self, content_lower: str) -> bool:
+        """Check for live chat widgets (expects lowercased HTML)"""
+        return _HAS_LIVE_CHAT(content_lower)
     
     def _extract_phone(self, text: str) -> str:
         """Extract phone number from text"""
-        patterns = [
-            r'\+39\s?\d{2,3}[\s\-]?\d{3}[\s\-]?\d{4}',  # Italian
-            r'\+\d[\d\s\-\(\)]{7,15}',  # General international
-            r'\(\d{3}\)\s?\d{3}[\s\-]?\d{4}',  # US format
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in _PHONE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(0)
         return ""
     
     def _extract_email(self, text: str) -> str:
         """Extract email from text"""
-        pattern = r'[\w.-]+@[\w.-]+\.\w+'
-        match = re.search(pattern, text)
+        match = _EMAIL_RE.search(text)
         return match.group(0) if match else ""
     
     def _extract_address(self, text: str) -> str:
         """Extract address from text"""
         # Look for Via/Viale patterns (Italian addresses)
-        patterns = [
-            r'Via\s+[\w\s]+,?\s*\d+[^.\n]*(?:Rome|Italy)',
-            r'Viale\s+[\w\s]+,?\s*\d+[^.\n]*',
-            r'Piazza\s+[\w\s]+,?\s*\d+[^.\n]*',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _ADDRESS_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(0)
         return ""
@@ -256,50 +443,82 @@ class TourWebsiteAnalyzer:
         return ""
 
 
-async def analyze_companies(companies_json_path: str, output_path: str, limit: int = None):
-    """Analyze all companies from JSON file"""
+async def analyze_companies(companies_json_path: str, output_path: str, limit: int = None,
+                            concurrency: int = 8, browser: Optional[Browser] = None,
+                            cache_dir: Optional[str] = None, cache_ttl_days: float = 7,
+                            weights: Optional[Dict[str, float]] = None):
+    """Analyze all companies from JSON file, `concurrency` sites at a time.
     
-    # Load companies
-    with open(companies_json_path, 'r', encoding='utf-8') as f:
-        companies = json.load(f)
+    If `output_path` ends in `.jsonl`, each result is appended as soon as its
+    site finishes and nothing is kept in memory; otherwise a JSON array is
+    written at the end. Pass `browser` to reuse an already-running browser
+    instead of launching one, and `cache_dir` to reuse results from earlier
+    runs that are younger than `cache_ttl_days`. The summary uses `weights`
+    (see `aggregate_scores`) when given.
+    """
+    
+    # Stream companies so the first sites start loading while the rest is still being parsed
+    companies = iter_json_array(companies_json_path)
     
     if limit:
-        companies = companies[:limit]
+        companies = islice(companies, limit)
+    
+    analyzer = TourWebsiteAnalyzer(concurrency=concurrency, browser=browser,
+                                   cache_dir=cache_dir, cache_ttl_days=cache_ttl_days)
+    await analyzer.init()
     
-    analyzer = TourWebsiteAnalyzer()
-    results = []
+    jsonl_file = open(output_path, 'wb') if output_path.endswith('.jsonl') else None
+    done = [0]
     
-    print(f"Analyzing {len(companies)} websites...")
+    print(f"Analyzing websites from {companies_json_path}...")
     
-    for i, company in enumerate(companies, 1):
+    async def analyze_one(i: int, company: Dict) -> Optional[Dict]:
         url = company.get('website', '')
+        name = company.get('title', 'Unknown')
         if not url or not url.startswith('http'):
-            print(f"[{i}/{len(companies)}] Skipping {company.get('title', 'Unknown')} - no valid URL")
-            continue
-            
-        print(f"[{i}/{len(companies)}] Analyzing {company.get('title', 'Unknown')}...")
+            print(f"[{i}] Skipping {name} - no valid URL")
+            return None
         
+        print(f"[{i}] Analyzing {name}...")
         try:
-            score = await analyzer.analyze_website(url, company.get('title', 'Unknown'))
-            results.append(score.to_dict())
-            print(f"    Score: {score.total_score}/100 (Grade: {score.grade})")
+            score = await analyzer.analyze_website(url, name)
         except Exception as e:
-            print(f"    Error: {e}")
+            # Record the failure (including dead sites) so the output still accounts for every site
+            print(f"    [{i}] {name} - Error: {e}")
+            result = {'url': url, 'company_name': name, 'error': repr(e)}
+        else:
+            print(f"    [{i}] {name} - Score: {score.total_score}/100 (Grade: {score.grade})")
+            result = score.to_dict()
+        
+        done[0] += 1
+        if done[0] % 10 == 0:
+            print(f"Progress: {done[0]} sites done", file=sys.stderr)
+        
+        if jsonl_file:
+            jsonl_file.write(dumps_line(result))
+            jsonl_file.flush()
+            return None
+        return result
     
-    await analyzer.close()
+    try:
+        results = await process_stream(companies, analyze_one, concurrency)
+    finally:
+        await analyzer.close()
+        if jsonl_file:
+            jsonl_file.close()
     
-    # Save results
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    # Save results (already written line by line for .jsonl)
+    if not jsonl_file:
+        dump_json(results, output_path)
     
     print(f"\nResults saved to {output_path}")
     
     # Print summary
-    if results:
-        avg_score = sum(r['total_score'] for r in results) / len(results)
-        print(f"\nAverage Score: {avg_score:.1f}/100")
-        print(f"Highest: {max(r['total_score'] for r in results)}/100")
-        print(f"Lowest: {min(r['total_score'] for r in results)}/100")
+    ranked, totals = aggregate_scores(output_path, weights)
+    if totals:
+        print(f"\nAverage Score: {sum(totals) / len(totals):.1f}/100")
+        print(f"Highest: {totals[0]:g}/100 ({ranked[0]['company_name']})")
+        print(f"Lowest: {totals[-1]:g}/100 ({ranked[-1]['company_name']})")
 
 
 if __name__ == "__main__":
@@ -2,31 +2,59 @@
 Benchmark script to measure time and memory usage
 """
 
+import os
+import sys
 import time
-import psutil
-import asyncio
-import json
-from analyzer import TourWebsiteAnalyzer, analyze_companies
-from advanced_analyzer import AdvancedAnalyzer, run_advanced_analysis
+from itertools import islice
+
+from json_io import iter_json_array
+from worker_pool import run
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PROCESS = None  # psutil.Process, created on first use where /proc is unavailable
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
 
 
 def get_memory_usage():
-    """Get current memory usage in MB"""
-    process = psutil.Process()
-    return process.memory_info().rss / 1024 / 1024
+    """Get current memory usage (RSS) in MB"""
+    global _PROCESS
+    try:
+        # Linux: resident pages are the second field
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 / 1024
+    except OSError:
+        pass
+    if _PROCESS is None:
+        import psutil
+        _PROCESS = psutil.Process()
+    return _PROCESS.memory_info().rss / 1024 / 1024
+
+
+def get_peak_memory_usage():
+    """Get the process's peak memory usage (max RSS) in MB, or None where getrusage is unavailable"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB on Linux
+    return max_rss / 1024 / 1024 if sys.platform == 'darwin' else max_rss / 1024
 
 
 async def benchmark_analysis(companies_json: str, limit: int = 5):
     """Benchmark the analysis tools"""
+    # Imported here so `benchmark.py estimate` doesn't load Playwright
+    from analyzer import analyze_companies
+    from advanced_analyzer import run_advanced_analysis
     
     print("="*70)
     print("BENCHMARK: Website Analysis Performance")
     print("="*70)
     
-    # Load companies
-    with open(companies_json, 'r') as f:
-        all_companies = json.load(f)
-    companies = all_companies[:limit]
+    # Load companies (only the first `limit` are parsed)
+    companies = list(islice(iter_json_array(companies_json), limit))
     
     print(f"\nTesting with {len(companies)} companies...")
     print(f"Memory at start: {get_memory_usage():.1f} MB")
@@ -37,11 +65,12 @@ async def benchmark_analysis(companies_json: str, limit: int = 5):
     print("-"*70)
     
     start_mem = get_memory_usage()
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    await analyze_companies(companies_json, "benchmark_basic.json", limit)
+    # No result caches: every run must measure real page loads
+    await analyze_companies(companies_json, "benchmark_basic.json", limit, cache_dir=None)
     
-    basic_time = time.time() - start_time
+    basic_time = time.perf_counter() - start_time
     basic_mem = get_memory_usage() - start_mem
     
     print(f"\nTime: {basic_time:.1f} seconds ({basic_time/len(companies):.1f}s per site)")
@@ -53,11 +82,11 @@ async def benchmark_analysis(companies_json: str, limit: int = 5):
     print("-"*70)
     
     start_mem = get_memory_usage()
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    await run_advanced_analysis(companies_json, "benchmark_advanced.json", limit)
+    await run_advanced_analysis(companies_json, "benchmark_advanced.json", limit, cache_dir=None)
     
-    adv_time = time.time() - start_time
+    adv_time = time.perf_counter() - start_time
     adv_mem = get_memory_usage() - start_mem
     
     print(f"\nTime: {adv_time:.1f} seconds ({adv_time/len(companies):.1f}s per site)")
@@ -73,6 +102,10 @@ async def benchmark_analysis(companies_json: str, limit: int = 5):
     print(f"{'Memory per site':<30} {basic_mem/len(companies):.1f} MB{'':<7} {adv_mem/len(companies):.1f} MB")
     print(f"{'Total for 100 sites':<30} {basic_time/len(companies)*100/60:.1f} min{'':<7} {adv_time/len(companies)*100/60:.1f} min")
     print(f"{'Total for 430 sites':<30} {basic_time/len(companies)*430/60:.1f} min{'':<7} {adv_time/len(companies)*430/60:.1f} min")
+    
+    peak = get_peak_memory_usage()
+    if peak is not None:
+        print(f"\nPeak memory (whole run): {peak:.1f} MB")
 
 
 def estimate_full_run():
@@ -111,7 +144,7 @@ if __name__ == "__main__":
         estimate_full_run()
     else:
         # Run actual benchmark
-        asyncio.run(benchmark_analysis(
+        run(benchmark_analysis(
             "../dataset_crawler-google-places_2026-01-22_05-33-25-536.json",
             limit=3
         ))
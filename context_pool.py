@@ -0,0 +1,80 @@
+"""
+Context Pool
+Reusable Playwright browser contexts shared by concurrent analysis workers
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+from playwright.async_api import Browser, BrowserContext
+
+
+class ContextPool:
+    """At most `size` contexts on one browser, created on demand and reused.
+
+    Workers `acquire()` a context, open their page in it and `release()` it when
+    done. Contexts are wiped every RECYCLE_EVERY uses instead of being recreated;
+    with `max_uses` set, a context is closed after that many uses and a fresh one
+    takes its slot (long-lived contexts can start timing out on navigation).
+    """
+
+    # Clear cookies and permissions on a context after this many sites
+    RECYCLE_EVERY = 10
+
+    def __init__(self, browser: Browser, size: int,
+                 setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+                 max_uses: Optional[int] = None, **context_options):
+        self.browser = browser
+        self.size = size
+        self.max_uses = max_uses
+        self._setup = setup  # e.g. install request routes on each new context
+        self._context_options = context_options
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._uses: Dict[BrowserContext, int] = {}
+        self._created = 0
+
+    async def acquire(self) -> BrowserContext:
+        """Take an idle context, opening a new one while under `size`"""
+        if self._idle.empty() and self._created < self.size:
+            self._created += 1  # Counted before awaiting so concurrent callers respect the cap
+            try:
+                return await self._open()
+            except Exception:
+                self._created -= 1
+                raise
+        context = await self._idle.get()
+        if context is None:  # Slot left by a retired context
+            try:
+                return await self._open()
+            except Exception:
+                self._idle.put_nowait(None)
+                raise
+        return context
+
+    async def _open(self) -> BrowserContext:
+        context = await self.browser.new_context(**self._context_options)
+        if self._setup:
+            await self._setup(context)
+        self._uses[context] = 0
+        return context
+
+    async def release(self, context: BrowserContext):
+        """Return a context to the pool, wiping its state every few uses"""
+        self._uses[context] += 1
+        if self.max_uses and self._uses[context] >= self.max_uses:
+            # Retire it; the next acquire() opens a replacement in its slot
+            del self._uses[context]
+            self._idle.put_nowait(None)
+            await context.close()
+            return
+        if self._uses[context] % self.RECYCLE_EVERY == 0:
+            await context.clear_cookies()
+            await context.clear_permissions()
+        self._idle.put_nowait(context)
+
+    async def close(self):
+        for context in self._uses:
+            await context.close()
+        self._uses.clear()
+        self._idle = asyncio.Queue()
+        self._created = 0
@@ -2,16 +2,24 @@
 Helper script to deploy analyzer to GitHub Actions
 """
 
+import shlex
 import subprocess
 import os
 import sys
 from pathlib import Path
 
+from json_io import load_json, dump_json
+
+
+DEFAULT_DATASET = "dataset_crawler-google-places_2026-01-22_05-33-25-536.json"
+
 
 def run_command(cmd, cwd=None):
-    """Run shell command"""
-    print(f">>> {cmd}")
-    result = subprocess.run(cmd, shell=True, cwd=cwd, capture_output=True, text=True)
+    """Run a command (argument list, or a string split like a shell would) without a shell"""
+    if isinstance(cmd, str):
+        cmd = shlex.split(cmd)
+    print(f">>> {shlex.join(cmd)}")
+    result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
     if result.returncode != 0:
         print(f"Error: {result.stderr}")
         return False
@@ -19,6 +27,19 @@ def run_command(cmd, cwd=None):
     return True
 
 
+_current_branch = None
+
+
+def current_branch():
+    """Name of the checked-out git branch (looked up once)"""
+    global _current_branch
+    if _current_branch is None:
+        result = subprocess.run(["git", "symbolic-ref", "--short", "HEAD"],
+                                capture_output=True, text=True)
+        _current_branch = result.stdout.strip() or "main"
+    return _current_branch
+
+
 def setup_github_repo():
     """Setup GitHub repository for cloud deployment"""
     
@@ -29,28 +50,28 @@ def setup_github_repo():
     # Check if git is initialized
     if not Path(".git").exists():
         print("\n[1/5] Initializing git repository...")
-        run_command("git init")
-        run_command("git add .")
-        run_command('git commit -m "Initial commit"')
+        run_command(["git", "init"])
+        run_command(["git", "add", "."])
+        run_command(["git", "commit", "-m", "Initial commit"])
     else:
         print("\n[1/5] Git repository already initialized")
     
     # Check for GitHub remote
-    result = subprocess.run("git remote -v", shell=True, capture_output=True, text=True)
+    result = subprocess.run(["git", "remote", "-v"], capture_output=True, text=True)
     if "github.com" not in result.stdout:
         print("\n[2/5] Adding GitHub remote...")
         print("Enter your GitHub repository URL (e.g., https://github.com/username/tour-analyzer)")
         repo_url = input("> ").strip()
         if repo_url:
-            run_command(f"git remote add origin {repo_url}")
+            run_command(["git", "remote", "add", "origin", repo_url])
     else:
         print("\n[2/5] GitHub remote already configured")
     
     # Push code
     print("\n[3/5] Pushing code to GitHub...")
-    run_command("git add .")
-    run_command('git commit -m "Add analyzer and GitHub Actions workflow" || true')
-    run_command("git push -u origin main || git push -u origin master")
+    run_command(["git", "add", "."])
+    run_command(["git", "commit", "-m", "Add analyzer and GitHub Actions workflow"])  # Fails harmlessly if nothing changed
+    run_command(["git", "push", "-u", "origin", current_branch()])
     
     print("\n[4/5] Setup complete!")
     print("\n[5/5] Next steps:")
@@ -89,6 +110,28 @@ Cost: $0 (within free tier)
 """)
 
 
+def split_dataset(input_json: str, n_chunks: int, out_dir: str = "chunks") -> dict:
+    """Split the companies list into `n_chunks` files for a GitHub Actions matrix.
+    
+    Companies are dealt round-robin (every n-th one per chunk) so slow sites that
+    cluster in the dataset are spread across runners. Writes `chunk_{i}.json`
+    files plus `matrix.json`, and returns the matrix.
+    """
+    companies = load_json(input_json)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    
+    matrix = {"include": []}
+    for i in range(n_chunks):
+        chunk_file = out / f"chunk_{i}.json"
+        dump_json(companies[i::n_chunks], chunk_file)
+        matrix["include"].append({"chunk": i, "file": chunk_file.as_posix()})
+    
+    dump_json(matrix, out / "matrix.json", indent=False)
+    print(f"Split {len(companies)} companies into {n_chunks} chunks in {out}/")
+    return matrix
+
+
 def create_repo_instructions():
     """Show instructions for creating GitHub repo"""
     print("""
@@ -109,10 +152,16 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Deploy to GitHub Actions')
     parser.add_argument('--setup', action='store_true', help='Setup GitHub repository')
     parser.add_argument('--estimate', action='store_true', help='Show time estimates')
+    parser.add_argument('--split', type=int, metavar='N',
+                       help='Split the dataset into N chunk files for parallel runners')
+    parser.add_argument('--input', '-i', default=DEFAULT_DATASET, help='Companies JSON (for --split)')
+    parser.add_argument('--out-dir', default='chunks', help='Where to write chunk files (for --split)')
     
     args = parser.parse_args()
     
-    if args.estimate:
+    if args.split:
+        split_dataset(args.input, args.split, args.out_dir)
+    elif args.estimate:
         estimate_time()
     elif args.setup:
         setup_github_repo()
@@ -120,6 +169,7 @@ if __name__ == "__main__":
         print("Usage:")
         print("  python deploy_to_github.py --estimate   # Show time estimates")
         print("  python deploy_to_github.py --setup      # Setup GitHub repo")
+        print("  python deploy_to_github.py --split 10   # Chunk dataset for parallel runners")
         print("\nTo deploy to cloud:")
         print("  1. Create GitHub repo at https://github.com/new")
         print("  2. Run: python deploy_to_github.py --setup")
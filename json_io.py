@@ -0,0 +1,112 @@
+"""
+JSON file helpers
+Uses orjson when installed (several times faster on large result arrays), stdlib json otherwise
+"""
+
+import json
+from typing import Any, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def load_json(path) -> Any:
+    """Read and parse a JSON file"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def dump_json(data: Any, path, indent: bool = True):
+    """Write `data` to `path` as UTF-8 JSON, 2-space indented unless `indent=False`"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2 if indent else None, ensure_ascii=False)
+
+
+def iter_json_array(path) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array one at a time.
+    
+    Streams with ijson when installed, so large inputs are never fully in memory;
+    otherwise falls back to loading the whole file.
+    """
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+        return
+    yield from load_json(path)
+
+
+def dumps_line(data: Any) -> bytes:
+    """Serialize `data` as one compact JSON Lines record (with trailing newline)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def iter_jsonl(path) -> Iterator[Any]:
+    """Yield the records of a JSON Lines file one at a time"""
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def iter_records(path) -> Iterator[Any]:
+    """Yield records from either a `.jsonl` file or a JSON array file"""
+    if str(path).endswith('.jsonl'):
+        return iter_jsonl(path)
+    return iter_json_array(path)
+
+
+def iter_analyzed(path) -> Iterator[Any]:
+    """Yield the analysis results in `path` (JSON array or JSONL), skipping failed sites.
+    
+    The analyzer records sites it couldn't load as `{url, company_name, error}`;
+    those have no scores or extracted details to work with.
+    """
+    return (record for record in iter_records(path) if 'error' not in record)
+
+
+def encode_record(data: Any) -> bytes:
+    """Serialize `data` as compact JSON, ready for `dump_encoded_array`"""
+    return dumps_line(data).rstrip(b'\n')
+
+
+def dump_encoded_array(encoded: Iterable[bytes], path) -> int:
+    """Write already-serialized records as a JSON array, one per line.
+    
+    Lets a record that goes into several files be serialized only once.
+    Returns the number of records written.
+    """
+    count = 0
+    with open(path, 'wb') as out:
+        out.write(b'[\n')
+        for record in encoded:
+            if count:
+                out.write(b',\n')
+            out.write(record)
+            count += 1
+        out.write(b'\n]\n')
+    return count
+
+
+def convert_jsonl_to_json(jsonl_path, json_path) -> int:
+    """Rewrite a JSON Lines file as a JSON array, for tools that expect one.
+    
+    Streams record by record; returns the number of records written.
+    """
+    return dump_encoded_array((encode_record(record) for record in iter_jsonl(jsonl_path)), json_path)
@@ -3,30 +3,57 @@ Main Orchestrator for Tour Website Automation
 Analyzes, generates, and compares tour websites
 """
 
-import asyncio
-import json
 import argparse
 from pathlib import Path
 from datetime import datetime
 
-from analyzer import TourWebsiteAnalyzer, analyze_companies
-from site_generator import SiteGenerator, CompanyInfo, generate_sites
-from visual_recorder import VisualRecorder, ComparisonConfig, record_comparisons
+from json_io import load_json, dump_json
+from worker_pool import run
+
+# Playwright, the analyzer, site generator and recorder are imported inside the
+# phases that use them, so `init` and `--help` start without loading them
 
 
 class TourWebsiteAutomation:
     """Main automation pipeline"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, run_id: str = None):
         self.config = config
+        # One stamp per run, so every phase's outputs share the same suffix
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
         self.results_dir = Path(config.get('results_dir', './results'))
-        self.results_dir.mkdir(exist_ok=True)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        # Sites analyzed at once (each holds one browser page)
+        self.max_concurrency = config.get('max_concurrency', 8)
+        # Per-URL analysis cache; reruns skip sites analyzed within the TTL
+        self.cache_dir = None if config.get('no_cache') else str(self.results_dir / 'cache')
+        self.cache_ttl_days = config.get('cache_ttl_days', 7)
+        # Shared for the life of the pipeline when used as `async with`
+        self.playwright = None
+        self.browser = None
+    
+    @property
+    def analysis_output(self) -> Path:
+        return self.results_dir / f"analysis_{self.run_id}.jsonl"
+    
+    @property
+    def generated_output(self) -> Path:
+        return self.results_dir / f"generated_{self.run_id}"
+    
+    async def __aenter__(self):
+        """Launch one browser that every phase reuses (sites get their own contexts)"""
+        from playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True, args=['--disable-dev-shm-usage'])
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.browser.close()
+        await self.playwright.stop()
+        self.browser = None
         
     async def run_full_pipeline(self, companies_json: str, limit: int = None):
         """Run the complete automation pipeline"""
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         print("=" * 70)
         print("TOUR WEBSITE AUTOMATION PIPELINE")
         print("=" * 70)
@@ -36,17 +63,14 @@ class TourWebsiteAutomation:
         print("PHASE 1: ANALYZING WEBSITES")
         print("=" * 70)
         
-        analysis_output = self.results_dir / f"analysis_{timestamp}.json"
-        await analyze_companies(companies_json, str(analysis_output), limit)
+        analysis_output = await self.analyze_only(companies_json, limit)
         
         # Phase 2: Generate Sites
         print("\n" + "=" * 70)
         print("PHASE 2: GENERATING WHITE-LABEL SITES")
         print("=" * 70)
         
-        generated_output = self.results_dir / f"generated_{timestamp}"
-        generate_sites(str(analysis_output), self.config['template_path'], 
-                      str(generated_output), limit)
+        generated_output = self.generate_only(analysis_output, limit)
         
         # Phase 3: Visual Comparison (requires local dev servers running)
         print("\n" + "=" * 70)
@@ -64,45 +88,55 @@ class TourWebsiteAutomation:
         print(f"Generated Sites: {generated_output}")
         
         return {
-            'analysis': str(analysis_output),
-            'generated': str(generated_output)
+            'analysis': analysis_output,
+            'generated': generated_output
         }
     
     async def analyze_only(self, companies_json: str, limit: int = None):
         """Run only the analysis phase"""
+        from analyzer import analyze_companies
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        analysis_output = self.results_dir / f"analysis_{timestamp}.json"
-        
-        await analyze_companies(companies_json, str(analysis_output), limit)
+        analysis_output = self.analysis_output
+        await analyze_companies(companies_json, str(analysis_output), limit,
+                                concurrency=self.max_concurrency, browser=self.browser,
+                                cache_dir=self.cache_dir, cache_ttl_days=self.cache_ttl_days,
+                                weights=self.config.get('scoring_weights'))
         return str(analysis_output)
     
     def generate_only(self, analysis_json: str, limit: int = None):
         """Run only the generation phase"""
+        from site_generator import generate_sites
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        generated_output = self.results_dir / f"generated_{timestamp}"
-        
+        generated_output = self.generated_output
         generate_sites(analysis_json, self.config['template_path'], 
                       str(generated_output), limit)
         return str(generated_output)
     
     async def compare_only(self, manifest_json: str, output_dir: str = None):
         """Run only the visual comparison phase"""
+        from visual_recorder import record_comparisons
         
         if output_dir is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_dir = self.results_dir / f"comparisons_{timestamp}"
+            output_dir = self.results_dir / f"comparisons_{self.run_id}"
         
-        await record_comparisons(manifest_json, str(output_dir))
+        await record_comparisons(manifest_json, str(output_dir), jobs=self.config.get('compare_jobs'),
+                                 emit_mp4=self.config.get('compare_mp4', False),
+                                 emit_gif=self.config.get('compare_gif', False))
         return str(output_dir)
 
 
+async def run_with_browser(config: dict, job):
+    """Run `job(automation)` with a pipeline that owns one shared browser"""
+    async with TourWebsiteAutomation(config) as automation:
+        return await job(automation)
+
+
 def create_sample_config():
     """Create a sample configuration file"""
     config = {
         "template_path": "../rome-tour-tickets",
         "results_dir": "./results",
+        "max_concurrency": 8,
         "dev_server": {
             "host": "localhost",
             "port": 3000
@@ -116,8 +150,7 @@ def create_sample_config():
         }
     }
     
-    with open('config.json', 'w') as f:
-        json.dump(config, f, indent=2)
+    dump_json(config, 'config.json')
     
     print("Created config.json - edit this file to customize settings")
 
@@ -128,11 +161,21 @@ def main():
                        help='Command to run')
     parser.add_argument('--input', '-i', default='../dataset_crawler-google-places_2026-01-22_05-33-25-536.json',
                        help='Input JSON file with company data')
-    parser.add_argument('--analysis', '-a', help='Analysis JSON file (for generate command)')
+    parser.add_argument('--analysis', '-a', help='Analysis JSON or JSONL file (for generate command)')
     parser.add_argument('--manifest', '-m', help='Generated sites manifest (for compare command)')
     parser.add_argument('--limit', '-l', type=int, help='Limit number of companies to process')
     parser.add_argument('--config', '-c', default='config.json',
                        help='Configuration file')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Re-analyze every site instead of reusing cached results')
+    parser.add_argument('--cache-ttl-days', type=float,
+                       help='Reuse cached analysis results younger than this (default 7)')
+    parser.add_argument('--jobs', '-j', type=int,
+                       help='Processes to split comparisons across (default: half the CPUs for 100+ sites)')
+    parser.add_argument('--mp4', action='store_true',
+                       help='Also encode a before/after MP4 per site (needs ffmpeg)')
+    parser.add_argument('--gif', action='store_true',
+                       help='Also encode a before/after GIF per site')
     
     args = parser.parse_args()
     
@@ -142,33 +185,42 @@ def main():
     
     # Load config
     if Path(args.config).exists():
-        with open(args.config) as f:
-            config = json.load(f)
+        config = load_json(args.config)
     else:
         config = {
             'template_path': '../rome-tour-tickets',
-            'results_dir': './results'
+            'results_dir': './results',
+            'max_concurrency': 8
         }
     
-    automation = TourWebsiteAutomation(config)
+    if args.no_cache:
+        config['no_cache'] = True
+    if args.cache_ttl_days is not None:
+        config['cache_ttl_days'] = args.cache_ttl_days
+    if args.jobs is not None:
+        config['compare_jobs'] = args.jobs
+    if args.mp4:
+        config['compare_mp4'] = True
+    if args.gif:
+        config['compare_gif'] = True
     
     if args.command == 'full':
-        asyncio.run(automation.run_full_pipeline(args.input, args.limit))
+        run(run_with_browser(config, lambda auto: auto.run_full_pipeline(args.input, args.limit)))
     
     elif args.command == 'analyze':
-        asyncio.run(automation.analyze_only(args.input, args.limit))
+        run(run_with_browser(config, lambda auto: auto.analyze_only(args.input, args.limit)))
     
     elif args.command == 'generate':
         if not args.analysis:
             print("Error: --analysis required for generate command")
             return
-        automation.generate_only(args.analysis, args.limit)
+        TourWebsiteAutomation(config).generate_only(args.analysis, args.limit)
     
     elif args.command == 'compare':
         if not args.manifest:
             print("Error: --manifest required for compare command")
             return
-        asyncio.run(automation.compare_only(args.manifest))
+        run(TourWebsiteAutomation(config).compare_only(args.manifest))
 
 
 if __name__ == "__main__":
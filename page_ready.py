@@ -0,0 +1,67 @@
+"""
+Page Readiness
+Waits for a freshly loaded page to go quiet, using Chromium's CDP performance metrics
+"""
+
+import time
+
+from playwright.async_api import Page
+
+# Set to True to go back to Playwright's 'networkidle' plus a fixed settle delay
+USE_NETWORKIDLE = False
+
+# The page counts as settled after this long with no main-thread work and no new resources
+QUIET_MS = 500
+MAX_WAIT_MS = 8000
+POLL_MS = 100
+# Main-thread time (seconds, CDP TaskDuration) per poll that still counts as idle
+TASK_EPSILON = 0.005
+
+
+async def _wait_networkidle(page: Page, max_wait_ms: int) -> bool:
+    try:
+        await page.wait_for_load_state('networkidle', timeout=max_wait_ms)
+        settled = True
+    except Exception:
+        settled = False  # Long-polling pages never go idle
+    await page.wait_for_timeout(2000)  # Let animations settle
+    return settled
+
+
+async def wait_until_settled(page: Page, max_wait_ms: int = MAX_WAIT_MS) -> bool:
+    """Call after `page.goto(..., wait_until='domcontentloaded')`.
+
+    Polls CDP `Performance.getMetrics` until TaskDuration stops growing and no
+    new resource entries appear for QUIET_MS, capped at `max_wait_ms`. Returns
+    False if the cap was hit; the page is usable either way. Falls back to
+    'networkidle' when CDP isn't available (non-Chromium browsers).
+    """
+    if USE_NETWORKIDLE:
+        return await _wait_networkidle(page, max_wait_ms)
+    try:
+        cdp = await page.context.new_cdp_session(page)
+    except Exception:
+        return await _wait_networkidle(page, max_wait_ms)
+
+    try:
+        await cdp.send('Performance.enable')
+        deadline = time.monotonic() + max_wait_ms / 1000
+        last_busy = last_resources = None
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            metrics = (await cdp.send('Performance.getMetrics'))['metrics']
+            busy = next((m['value'] for m in metrics if m['name'] == 'TaskDuration'), 0)
+            resources = await page.evaluate("performance.getEntriesByType('resource').length")
+            now = time.monotonic()
+            if last_busy is None or busy - last_busy > TASK_EPSILON or resources != last_resources:
+                quiet_since = now
+            elif now - quiet_since >= QUIET_MS / 1000:
+                return True
+            last_busy, last_resources = busy, resources
+            await page.wait_for_timeout(POLL_MS)
+        return False
+    finally:
+        try:
+            await cdp.detach()
+        except Exception:
+            pass  # Page may have navigated or closed
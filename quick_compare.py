@@ -4,11 +4,22 @@ Modifies template in-place, screenshots old vs new, creates GIF, then restores.
 """
 
 import asyncio
-import json
+import functools
+import hashlib
+import io
+import os
+import time
+import re
 import shutil
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
+from itertools import islice
 from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from json_io import iter_analyzed, dump_json
+from worker_pool import process_stream
 
 try:
     from playwright.async_api import async_playwright
@@ -18,6 +29,128 @@ except ImportError:
     print("Then: playwright install chromium")
     raise
 
+from page_ready import wait_until_settled
+
+try:
+    import ahocorasick  # pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# Labeled screenshot size, and the label banner's share of it
+SHOT_SIZE = (1280, 1600)
+LABEL_HEIGHT = 40
+
+# Requests that never show up in an above-the-fold screenshot. Fonts and images
+# are kept: they change what the page looks like.
+BLOCKED_RESOURCE_TYPES = {'media', 'websocket'}
+BLOCKED_DOMAINS = ('googletagmanager', 'google-analytics', 'doubleclick', 'facebook.net', 'hotjar', 'intercom')
+
+# True once every image intersecting the viewport has loaded (or failed)
+VISIBLE_IMAGES_LOADED_JS = """() => Array.from(document.images).every(
+    img => img.complete || img.getBoundingClientRect().top >= window.innerHeight)"""
+
+# True once the page title or text contains the given string (textContent, so CSS
+# text-transform doesn't matter)
+PAGE_HAS_TEXT_JS = """(text) => document.title.includes(text) ||
+    (!!document.body && document.body.textContent.includes(text))"""
+
+# After the template is rewritten, how long the dev server gets to serve the new render,
+# and how long each load waits for it (HMR) before reloading
+RENDER_WAIT_MS = 30000
+RENDER_POLL_MS = 3000
+
+# Build output and git metadata, left out of the template fingerprint
+TEMPLATE_IGNORE = {'node_modules', '.next', '.vercel', '.git'}
+
+# Companies compared at once (each holds up to two browser contexts)
+MAX_CONCURRENT_COMPARISONS = 5
+
+# Template text that customized_contents swaps out (written by customized()), per file
+TEMPLATE_TEXT = {
+    'layout': {
+        'title': 'title: "TicketsInRome | Official Vatican & Colosseum Tours"',
+        'description': 'description: "Exclusive skip-the-line tours for the Vatican Museums, Sistine Chapel, and St. Peter\'s Basilica. Book your official ticketsinrome experience today."',
+    },
+    'hero': {
+        'tagline': '"Rome, Curated."',
+        'subtitle': "Private access to the Colosseum, Vatican, and hidden gems. Experience Rome without the crowds.",
+    },
+    'footer': {
+        'brand': 'Tickets in <span className="text-emerald-500">Rome</span>',
+        'description': "Your premier gateway to the Eternal City. Experience Rome with our expert guides, skip-the-line access, and unforgettable customized journeys.",
+        'phone': '+39 351 419 9425',
+        'email': 'info@ticketsinrome.com',
+        'address': 'Via Tunisi 43,<br />Rome, Italy',
+        'copyright': 'Tickets in Rome',
+    },
+    'page': {
+        'tours_intro': 'Skip the line to the Sistine Chapel',
+    },
+}
+
+
+def _template_substituter(texts: Dict[str, str]):
+    """Build a single-pass `(content, values) -> content` rewriter for one file.
+    
+    Each template text in `texts` is replaced by `values[key]` when present and
+    left as is otherwise. Uses an Aho-Corasick automaton when pyahocorasick is
+    installed, otherwise a compiled regex alternation.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for key, text in texts.items():
+            automaton.add_word(text, (key, text))
+        automaton.make_automaton()
+        
+        def substitute(content: str, values: Dict[str, str]) -> str:
+            out, last = [], 0
+            # Leftmost-longest, non-overlapping matches
+            for end, (key, text) in automaton.iter_long(content):
+                start = end - len(text) + 1
+                out.append(content[last:start])
+                out.append(values.get(key, text))
+                last = end + 1
+            out.append(content[last:])
+            return ''.join(out)
+        return substitute
+    
+    pattern = re.compile('|'.join(re.escape(text) for text in texts.values()))
+    keys = {text: key for key, text in texts.items()}
+    return lambda content, values: pattern.sub(
+        lambda m: values.get(keys[m.group(0)], m.group(0)), content)
+
+
+# Built once at import: one matcher per file, reused for every company
+TEMPLATE_SUBS = {name: _template_substituter(texts) for name, texts in TEMPLATE_TEXT.items()}
+
+
+async def _block_noise(route):
+    """Abort trackers, chat widgets and media so pages settle sooner"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(d in request.url for d in BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+@functools.lru_cache(maxsize=8)
+def _get_font(size: int):
+    """Arial at `size` (Pillow's default font if unavailable), loaded once per size"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _same_size(img1: Image.Image, img2: Image.Image):
+    """Both images as RGB at SHOT_SIZE width and a common height (untouched when they already match)"""
+    size = (SHOT_SIZE[0], min(img1.height, img2.height, SHOT_SIZE[1]))
+    images = (img if img.mode == 'RGB' else img.convert('RGB') for img in (img1, img2))
+    # BILINEAR: these are previews, and LANCZOS costs ~3x more per pixel
+    return tuple(img if img.size == size else img.resize(size, Image.Resampling.BILINEAR)
+                 for img in images)
+
 
 @dataclass
 class Company:
@@ -35,7 +168,7 @@ class QuickComparer:
     def __init__(self, template_path: str, output_dir: str):
         self.template_path = Path(template_path)
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         
         # Files we will modify
         self.files_to_modify = {
@@ -48,6 +181,28 @@ class QuickComparer:
         # Store original content
         self.originals = {}
         
+        # Shared by every screenshot when used as `async with`
+        self.playwright = None
+        self.browser = None
+        # The template (and its dev server) can show only one company at a time
+        self.template_lock = asyncio.Lock()
+        # Rendered NEW screenshots by hash of the customized files, reused across runs
+        self.render_cache_dir = self.output_dir / "_cache"
+        self._template_digest = None
+    
+    async def __aenter__(self):
+        """Launch one browser for all screenshots (each URL gets its own context)"""
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=True, args=['--disable-gpu', '--disable-dev-shm-usage'])
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.browser.close()
+        await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
+        
     def backup_originals(self):
         """Backup original files"""
         for name, filepath in self.files_to_modify.items():
@@ -61,185 +216,190 @@ class QuickComparer:
             filepath.write_text(content, encoding='utf-8')
         print("Restored original files")
     
-    def customize_for_company(self, company: Company):
-        """Customize template files for a company"""
-        
-        # 1. Customize layout.tsx (title and meta)
-        layout_path = self.files_to_modify['layout']
-        content = self.originals['layout']
+    @contextmanager
+    def customized(self, contents: Dict[str, str]):
+        """Template files replaced by `contents`; original files are restored on exit, even on error"""
+        try:
+            for name, content in contents.items():
+                self.files_to_modify[name].write_text(content, encoding='utf-8')
+            yield
+        finally:
+            self.restore_originals()
+    
+    def template_digest(self) -> bytes:
+        """Fingerprint of the rest of the template (paths, sizes, mtimes), taken once per run.
+        
+        The customized files are left out: their text is hashed by render_key, and
+        writing and restoring them changes their mtimes on every comparison.
+        """
+        if self._template_digest is None:
+            skip = {str(path) for path in self.files_to_modify.values()}
+            h = hashlib.blake2b(digest_size=16)
+            for root, dirs, files in os.walk(self.template_path):
+                dirs[:] = sorted(d for d in dirs if d not in TEMPLATE_IGNORE)
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    if path in skip:
+                        continue
+                    st = os.stat(path)
+                    h.update(f"{os.path.relpath(path, self.template_path)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8'))
+            self._template_digest = h.digest()
+        return self._template_digest
+    
+    def render_key(self, contents: Dict[str, str], local_url: str) -> str:
+        """Hash of everything the NEW screenshot depends on: the template, the customized files and the URL"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.template_digest())
+        for name in sorted(contents):
+            h.update(contents[name].encode('utf-8'))
+        h.update(local_url.encode('utf-8'))
+        return h.hexdigest()
+    
+    def customized_contents(self, company: Company) -> Dict[str, str]:
+        """Customized text of each template file, built from the backed-up originals"""
         
         title = f"{company.name} | Official Tours & Tickets"
         description = company.description[:160] if company.description else f"Book official tours with {company.name}. Skip-the-line access to Rome's top attractions."
         description = description.replace('"', '\\"').replace('\n', ' ')
-        
-        # Replace metadata
-        content = content.replace(
-            'title: "TicketsInRome | Official Vatican & Colosseum Tours"',
-            f'title: "{title}"'
-        )
-        content = content.replace(
-            'description: "Exclusive skip-the-line tours for the Vatican Museums, Sistine Chapel, and St. Peter\'s Basilica. Book your official ticketsinrome experience today."',
-            f'description: "{description}"'
-        )
-        layout_path.write_text(content, encoding='utf-8')
-        
-        # 2. Customize Hero.tsx
-        hero_path = self.files_to_modify['hero']
-        content = self.originals['hero']
-        
-        # Change subtitle
-        content = content.replace(
-            '"Rome, Curated."',
-            f'"{company.name.split()[0]}, Curated."'
-        )
-        
-        # Change main subtitle text
-        old_sub = "Private access to the Colosseum, Vatican, and hidden gems. Experience Rome without the crowds."
-        new_sub = f"Experience Rome with {company.name}. Skip-the-line access to the Vatican, Colosseum, and hidden gems."
-        content = content.replace(old_sub, new_sub)
-        hero_path.write_text(content, encoding='utf-8')
-        
-        # 3. Customize Footer.tsx
-        footer_path = self.files_to_modify['footer']
-        content = self.originals['footer']
-        
-        # Company name
-        content = content.replace(
-            'Tickets in <span className="text-emerald-500">Rome</span>',
-            f'{company.name.split()[0]} <span className="text-emerald-500">{" ".join(company.name.split()[1:]) or "Tours"}</span>'
-        )
-        
-        # Description
-        old_desc = "Your premier gateway to the Eternal City. Experience Rome with our expert guides, skip-the-line access, and unforgettable customized journeys."
-        new_desc = f"Your premier gateway to Rome. Experience the Eternal City with {company.name} - expert guides and unforgettable journeys."
-        content = content.replace(old_desc, new_desc)
-        
-        # Contact info
+        name_words = company.name.split()
+        
+        replacements = {
+            # 1. layout.tsx (title and meta)
+            'layout': {
+                'title': f'title: "{title}"',
+                'description': f'description: "{description}"',
+            },
+            # 2. Hero.tsx (subtitle and main subtitle text)
+            'hero': {
+                'tagline': f'"{name_words[0]}, Curated."',
+                'subtitle': f"Experience Rome with {company.name}. Skip-the-line access to the Vatican, Colosseum, and hidden gems.",
+            },
+            # 3. Footer.tsx (company name, description, contact info, copyright)
+            'footer': {
+                'brand': f'{name_words[0]} <span className="text-emerald-500">{" ".join(name_words[1:]) or "Tours"}</span>',
+                'description': f"Your premier gateway to Rome. Experience the Eternal City with {company.name} - expert guides and unforgettable journeys.",
+                'copyright': company.name,
+            },
+            # 4. page.tsx (section subtitles)
+            'page': {
+                'tours_intro': f'With {company.name} - Skip the line to the Sistine Chapel',
+            },
+        }
         if company.phone:
-            content = content.replace('+39 351 419 9425', company.phone)
+            replacements['footer']['phone'] = company.phone
         if company.email:
-            content = content.replace('info@ticketsinrome.com', company.email)
+            replacements['footer']['email'] = company.email
         if company.address:
-            addr = company.address.replace(', ', '<br />')
-            content = content.replace('Via Tunisi 43,<br />Rome, Italy', addr)
-        
-        # Copyright
-        content = content.replace('Tickets in Rome', company.name)
-        footer_path.write_text(content, encoding='utf-8')
-        
-        # 4. Customize page.tsx (section subtitles)
-        page_path = self.files_to_modify['page']
-        content = self.originals['page']
+            replacements['footer']['address'] = company.address.replace(', ', '<br />')
         
-        # Add company name to section descriptions
-        content = content.replace(
-            'Skip the line to the Sistine Chapel',
-            f'With {company.name} - Skip the line to the Sistine Chapel'
-        )
-        footer_path.write_text(content, encoding='utf-8')
-        
-        print(f"Customized for {company.name}")
+        # One scan per file; template text without a replacement is left as is
+        return {name: TEMPLATE_SUBS[name](self.originals[name], values)
+                for name, values in replacements.items() if name in self.originals}
     
-    async def capture_screenshot(self, url: str, output_path: Path, label: str = None):
-        """Capture screenshot of a website"""
+    async def _wait_for_text(self, page, text: str):
+        """Reload `page` until it shows `text`, e.g. once the dev server has recompiled a template change"""
+        deadline = time.monotonic() + RENDER_WAIT_MS / 1000
+        while True:
+            try:
+                await page.wait_for_function(PAGE_HAS_TEXT_JS, arg=text, timeout=RENDER_POLL_MS)
+                return
+            except Exception:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"page never showed {text!r} (stale render?)")
+            await page.reload(wait_until='domcontentloaded', timeout=30000)
+    
+    async def capture_screenshot(self, url: str, output_path: Path, label: str = None,
+                                 expect_text: str = None) -> Tuple[Image.Image, bool]:
+        """Capture screenshot of a website, saved to `output_path` and returned in memory.
+        
+        With `expect_text`, the page is first reloaded until it contains that text.
+        The flag is False if a placeholder was saved instead.
+        """
         
-        from playwright.async_api import async_playwright
+        # Viewport sized so the labeled shot is exactly SHOT_SIZE (no resizing later)
+        context = await self.browser.new_context(
+            viewport={'width': SHOT_SIZE[0], 'height': SHOT_SIZE[1] - (LABEL_HEIGHT if label else 0)})
+        await context.route("**/*", _block_noise)
+        page = await context.new_page()
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page(viewport={'width': 1280, 'height': 2000})
+        try:
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            if expect_text:
+                await self._wait_for_text(page, expect_text)
+            await wait_until_settled(page)  # Best effort; screenshot what has loaded
             
+            # Above the fold only, so no scrolling: just wait (briefly) for the images in view
             try:
-                await page.goto(url, wait_until='networkidle', timeout=30000)
-                await page.wait_for_timeout(2000)  # Let animations settle
-                
-                # Scroll to load lazy content
-                await page.evaluate("window.scrollTo(0, 500)")
-                await page.wait_for_timeout(500)
-                
-                # Screenshot (above fold only for comparison)
-                await page.screenshot(path=str(output_path), full_page=False)
-                
-                # Add label
-                if label:
-                    await self._add_label(output_path, label)
-                
-            except Exception as e:
-                print(f"    Screenshot error: {e}")
-                # Create placeholder
-                self._create_placeholder(output_path, label or "Error")
+                await page.wait_for_function(VISIBLE_IMAGES_LOADED_JS, timeout=6000)
+            except Exception:
+                pass  # A stuck image shouldn't cost us the screenshot
             
-            await browser.close()
+            # Screenshot (above fold only for comparison), labeled in memory and encoded once
+            img = Image.open(io.BytesIO(await page.screenshot(type='jpeg', quality=85, full_page=False)))
+            if label:
+                img = self._add_label(img, label)
+            img.save(output_path, quality=85)
+            
+        except Exception as e:
+            print(f"    Screenshot error: {e}")
+            # Create placeholder
+            return self._create_placeholder(output_path, label or "Error"), False
+        finally:
+            await context.close()
         
-        return output_path
+        return img, True
     
-    async def _add_label(self, image_path: Path, label: str):
+    def _add_label(self, img: Image.Image, label: str) -> Image.Image:
         """Add label banner to screenshot"""
-        img = Image.open(image_path)
-        banner_height = 40
+        banner_height = LABEL_HEIGHT
         
         new_img = Image.new('RGB', (img.width, img.height + banner_height), '#1a1a1a')
         new_img.paste(img, (0, banner_height))
         
         draw = ImageDraw.Draw(new_img)
-        try:
-            font = ImageFont.truetype("arial.ttf", 24)
-        except:
-            font = ImageFont.load_default()
+        font = _get_font(24)
         
         bbox = draw.textbbox((0, 0), label, font=font)
         x = (img.width - (bbox[2] - bbox[0])) // 2
         y = (banner_height - (bbox[3] - bbox[1])) // 2
         
         draw.text((x, y), label, fill='white', font=font)
-        new_img.save(image_path, quality=90)
+        return new_img
     
-    def _create_placeholder(self, path: Path, text: str):
+    def _create_placeholder(self, path: Path, text: str) -> Image.Image:
         """Create placeholder error image"""
-        img = Image.new('RGB', (1280, 2000), '#f3f4f6')
+        img = Image.new('RGB', SHOT_SIZE, '#f3f4f6')
         draw = ImageDraw.Draw(img)
-        try:
-            font = ImageFont.truetype("arial.ttf", 32)
-        except:
-            font = ImageFont.load_default()
-        draw.text((500, 900), text, fill='#6b7280', font=font)
+        font = _get_font(32)
+        draw.text((500, 780), text, fill='#6b7280', font=font)
         img.save(path)
+        return img
     
-    def create_comparison_gif(self, old_img: Path, new_img: Path, output_path: Path, company_name: str):
+    def create_comparison_gif(self, old_img: Image.Image, new_img: Image.Image, output_path: Path, company_name: str):
         """Create animated GIF comparing old vs new"""
         
-        img1 = Image.open(old_img)
-        img2 = Image.open(new_img)
+        # Ensure same size (already true for our own screenshots); copies, since labels are drawn on them
+        img1, img2 = (img.copy() for img in _same_size(old_img, new_img))
         
-        # Ensure same size
-        target_height = min(img1.height, img2.height, 1600)
-        img1 = img1.resize((1280, target_height), Image.Resampling.LANCZOS)
-        img2 = img2.resize((1280, target_height), Image.Resampling.LANCZOS)
-        
-        # Create frames with labels
-        frames = []
+        # Frame 2: Transition, a half wipe (built before the labels are drawn on the originals)
+        wipe = img1.copy()
+        wipe.paste(img2.crop((0, 0, img2.width // 2, img2.height)), (0, 0))
+        ImageDraw.Draw(wipe).line([(img2.width // 2, 0), (img2.width // 2, img2.height)], fill='#dc2626', width=4)
         
         # Frame 1: Old
-        f1 = img1.copy()
-        draw = ImageDraw.Draw(f1)
-        try:
-            font = ImageFont.truetype("arial.ttf", 40)
-        except:
-            font = ImageFont.load_default()
+        draw = ImageDraw.Draw(img1)
+        font = _get_font(40)
         draw.rectangle([20, 20, 300, 80], fill='#dc2626')
         draw.text((35, 30), "BEFORE", fill='white', font=font)
-        frames.append(f1)
-        
-        # Frame 2: Transition
-        blend = Image.blend(img1.convert('RGB'), img2.convert('RGB'), alpha=0.5)
-        frames.append(blend)
         
         # Frame 3: New
-        f2 = img2.copy()
-        draw = ImageDraw.Draw(f2)
+        draw = ImageDraw.Draw(img2)
         draw.rectangle([20, 20, 250, 80], fill='#059669')
         draw.text((35, 30), "AFTER", fill='white', font=font)
-        frames.append(f2)
+        
+        # One shared 256-color palette (the wipe holds both sites' colors), no dithering
+        palette = wipe.quantize(256, dither=Image.Dither.NONE)
+        frames = [img.quantize(palette=palette, dither=Image.Dither.NONE) for img in (img1, wipe, img2)]
         
         # Save GIF
         frames[0].save(
@@ -252,16 +412,12 @@ class QuickComparer:
         
         return output_path
     
-    def create_side_by_side(self, old_img: Path, new_img: Path, output_path: Path, company_name: str):
+    def create_side_by_side(self, old_img: Image.Image, new_img: Image.Image, output_path: Path, company_name: str):
         """Create side-by-side comparison image"""
         
-        img1 = Image.open(old_img)
-        img2 = Image.open(new_img)
-        
-        # Resize to consistent height
-        target_height = min(img1.height, img2.height, 1600)
-        img1 = img1.resize((1280, target_height), Image.Resampling.LANCZOS)
-        img2 = img2.resize((1280, target_height), Image.Resampling.LANCZOS)
+        # Resize to consistent height (already true for our own screenshots)
+        img1, img2 = _same_size(old_img, new_img)
+        target_height = img1.height
         
         # Create combined image with gap
         gap = 20
@@ -270,12 +426,8 @@ class QuickComparer:
         
         # Header
         draw = ImageDraw.Draw(combined)
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 36)
-            label_font = ImageFont.truetype("arial.ttf", 24)
-        except:
-            title_font = ImageFont.load_default()
-            label_font = ImageFont.load_default()
+        title_font = _get_font(36)
+        label_font = _get_font(24)
         
         # Title
         title = f"{company_name} - Website Transformation"
@@ -291,7 +443,8 @@ class QuickComparer:
         combined.paste(img1, (0, 100))
         combined.paste(img2, (img1.width + gap, 100))
         
-        combined.save(output_path, quality=95)
+        # Lossy WebP, as in simple_screenshot: far faster to encode than PNG and much smaller
+        combined.save(output_path, quality=90, method=4)
         return output_path
     
     async def compare_company(self, company: Company, local_url: str = "http://localhost:3000"):
@@ -305,40 +458,53 @@ class QuickComparer:
         print(f"Comparing: {company.name}")
         print(f"{'='*60}")
         
-        # 1. Backup originals
-        self.backup_originals()
-        
-        # 2. Customize template
-        self.customize_for_company(company)
-        
-        # 3. Screenshot old website
+        # 1. Screenshot old website (doesn't touch the template, so runs alongside other companies)
         print(f"Capturing OLD: {company.website}")
-        old_img = comp_dir / "old.png"
-        await self.capture_screenshot(company.website, old_img, "BEFORE")
-        
-        # 4. Screenshot new (local) - assumes dev server is running
-        print(f"Capturing NEW: {local_url}")
-        new_img = comp_dir / "new.png"
-        await self.capture_screenshot(local_url, new_img, "AFTER")
-        
-        # 5. Create comparisons
+        old_path = comp_dir / "old.jpg"
+        old_capture = asyncio.create_task(self.capture_screenshot(company.website, old_path, "BEFORE"))
+        
+        new_path = comp_dir / "new.jpg"
+        async with self.template_lock:
+            # Template files are only ever modified under the lock, so they're the originals here
+            self.backup_originals()
+            contents = self.customized_contents(company)
+            cached_new = self.render_cache_dir / f"{self.render_key(contents, local_url)}.jpg"
+            if cached_new.exists():
+                print(f"Reusing NEW render: {cached_new}")
+                shutil.copyfile(cached_new, new_path)
+                new_img = Image.open(new_path)
+            else:
+                # 2. Customize template (restored on exit)
+                print(f"Customized for {company.name}")
+                with self.customized(contents):
+                    # 3. Screenshot new (local) - assumes dev server is running; waits until
+                    # it serves this company's render, not the previous one
+                    print(f"Capturing NEW: {local_url}")
+                    new_img, captured = await self.capture_screenshot(
+                        local_url, new_path, "AFTER", expect_text=company.name)
+                # Only a render that passed the check is cached
+                if captured:
+                    self.render_cache_dir.mkdir(exist_ok=True)
+                    shutil.copyfile(new_path, cached_new)
+        
+        # Compositing works on the in-memory captures; the JPEGs on disk are only for the manifest
+        old_img, _ = await old_capture
+        
+        # 4. Create comparisons
         print("Creating comparison images...")
         
         gif_path = comp_dir / "comparison.gif"
         self.create_comparison_gif(old_img, new_img, gif_path, company.name)
         
-        side_path = comp_dir / "side-by-side.png"
+        side_path = comp_dir / "side-by-side.webp"
         self.create_side_by_side(old_img, new_img, side_path, company.name)
         
-        # 6. Restore originals
-        self.restore_originals()
-        
         print(f"Results saved to: {comp_dir}")
         
         return {
             'company': company.name,
-            'old': str(old_img.relative_to(self.output_dir.parent)),
-            'new': str(new_img.relative_to(self.output_dir.parent)),
+            'old': str(old_path.relative_to(self.output_dir.parent)),
+            'new': str(new_path.relative_to(self.output_dir.parent)),
             'gif': str(gif_path.relative_to(self.output_dir.parent)),
             'side_by_side': str(side_path.relative_to(self.output_dir.parent)),
             'folder': str(comp_dir.relative_to(self.output_dir.parent))
@@ -348,12 +514,8 @@ class QuickComparer:
 async def main():
     """Run comparison on analysis results"""
     
-    # Load analysis results
-    with open('analysis_results.json', 'r') as f:
-        results = json.load(f)
-    
-    # Take first 3 for testing
-    results = results[:3]
+    # Load analysis results; take the first 3 reachable sites for testing
+    results = list(islice(iter_analyzed('analysis_results.json'), 3))
     
     comparer = QuickComparer(
         template_path="../rome-tour-tickets",
@@ -374,9 +536,7 @@ async def main():
     """)
     input()
     
-    all_results = []
-    
-    for result in results:
+    async def compare_one(i: int, result: dict):
         company = Company(
             name=result['company_name'],
             website=result['url'],
@@ -388,18 +548,23 @@ async def main():
         
         try:
             res = await comparer.compare_company(company)
-            # Add additional info from analysis
-            res['email'] = result.get('extracted_email', '')
-            res['phone'] = result.get('extracted_phone', '')
-            res['address'] = result.get('extracted_address', '')
-            res['original_score'] = result.get('total_score', 0)
-            res['grade'] = result.get('grade', 'N/A')
-            res['original_url'] = result.get('url', '')
-            all_results.append(res)
         except Exception as e:
+            # compare_company restores the template itself
             print(f"Error processing {company.name}: {e}")
-            # Make sure to restore originals even on error
-            comparer.restore_originals()
+            return None
+        
+        # Add additional info from analysis
+        res['email'] = result.get('extracted_email', '')
+        res['phone'] = result.get('extracted_phone', '')
+        res['address'] = result.get('extracted_address', '')
+        res['original_score'] = result.get('total_score', 0)
+        res['grade'] = result.get('grade', 'N/A')
+        res['original_url'] = result.get('url', '')
+        return res
+    
+    # Old-site screenshots overlap across companies; template work is serialized inside compare_company
+    async with comparer:
+        all_results = await process_stream(results, compare_one, concurrency=MAX_CONCURRENT_COMPARISONS)
     
     # Save comprehensive manifest with all info
     output_data = {
@@ -408,8 +573,7 @@ async def main():
         'companies': all_results
     }
     
-    with open('comparisons/comparison_results.json', 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    dump_json(output_data, 'comparisons/comparison_results.json', indent=False)
     
     # Also save a CSV-friendly version
     csv_data = []
@@ -427,8 +591,7 @@ async def main():
             'new_screenshot': r.get('new', '')
         })
     
-    with open('comparisons/comparison_summary.json', 'w', encoding='utf-8') as f:
-        json.dump(csv_data, f, indent=2, ensure_ascii=False)
+    dump_json(csv_data, 'comparisons/comparison_summary.json', indent=False)
     
     print(f"\n\nCompleted {len(all_results)} comparisons!")
     print(f"Results in: ./comparisons/")
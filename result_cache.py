@@ -0,0 +1,52 @@
+"""
+Result Cache
+Small on-disk JSON cache so reruns can skip sites that were already analyzed
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+async def fetch_validator(session, url: str) -> Optional[str]:
+    """Cheap HEAD (aiohttp `session`) for the page's ETag or Last-Modified, if the server sends one"""
+    try:
+        async with session.head(url, allow_redirects=True) as response:
+            return response.headers.get('ETag') or response.headers.get('Last-Modified')
+    except Exception:
+        return None
+
+
+class ResultCache:
+    """One JSON file per key under `cache_dir`, with optional expiry"""
+
+    def __init__(self, cache_dir: str, ttl_seconds: Optional[float] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: Tuple[str, ...]) -> Path:
+        digest = hashlib.sha1('\0'.join(key).encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Dict]:
+        """Return the cached value for `key`, or None if missing or expired"""
+        path = self._path(key)
+        try:
+            if self.ttl_seconds is not None and time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: Tuple[str, ...], value: Dict):
+        """Store `value` under `key` (atomic: write a temp file, then rename)"""
+        path = self._path(key)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -1,107 +1,41 @@
 """
 Parallel Processing Runner
-Runs multiple analysis jobs in parallel using multiprocessing
+Runs the analysis with many sites in flight on one event loop and one browser
 """
 
-import asyncio
-import json
+import os
 import time
-from multiprocessing import Pool, cpu_count
 from pathlib import Path
-from analyzer import TourWebsiteAnalyzer, analyze_companies
 
-
-def process_batch(batch_info):
-    """Process a single batch of companies"""
-    batch_id, companies_chunk = batch_info
-    
-    print(f"[Batch {batch_id}] Starting with {len(companies_chunk)} companies...")
-    
-    # Save temporary input file
-    temp_input = f"batch_{batch_id}_input.json"
-    with open(temp_input, 'w') as f:
-        json.dump(companies_chunk, f)
-    
-    # Run analysis
-    try:
-        asyncio.run(analyze_companies(temp_input, f"batch_{batch_id}_results.json", limit=None))
-        print(f"[Batch {batch_id}] Complete!")
-        return batch_id, True
-    except Exception as e:
-        print(f"[Batch {batch_id}] Error: {e}")
-        return batch_id, False
+from analyzer import analyze_companies
+from json_io import convert_jsonl_to_json
+from worker_pool import run
 
 
-def run_parallel(input_file: str, num_workers: int = None):
-    """Run analysis in parallel using multiple processes"""
+def run_parallel(input_file: str, num_workers: int = 10,
+                 output_file: str = 'parallel_analysis_results.json'):
+    """Run analysis with `num_workers` sites loading at once.
     
-    if num_workers is None:
-        num_workers = min(cpu_count(), 10)  # Max 10 parallel
+    The work is network-bound, so one process with a worker pool (see
+    `analyze_companies`) beats forking interpreters that each start a browser.
+    """
     
-    print(f"Loading companies from {input_file}...")
-    with open(input_file, 'r') as f:
-        all_companies = json.load(f)
-    
-    total = len(all_companies)
-    print(f"Total companies: {total}")
     print(f"Parallel workers: {num_workers}")
     
-    # Split into batches
-    batch_size = total // num_workers
-    batches = []
-    
-    for i in range(num_workers):
-        start = i * batch_size
-        if i == num_workers - 1:  # Last batch gets remainder
-            end = total
-        else:
-            end = start + batch_size
-        batches.append((i, all_companies[start:end]))
-    
-    print(f"Batch size: ~{batch_size} companies per worker\n")
+    # Results stream to JSONL as sites finish, then become one compact JSON array
+    stream_file = str(Path(output_file).with_suffix('.jsonl'))
+    start_time = time.perf_counter()
+    run(analyze_companies(input_file, stream_file, concurrency=num_workers))
+    elapsed = time.perf_counter() - start_time
     
-    # Process in parallel
-    start_time = time.time()
-    
-    with Pool(num_workers) as pool:
-        results = pool.map(process_batch, batches)
-    
-    elapsed = time.time() - start_time
-    
-    # Merge results
-    print("\nMerging results...")
-    all_results = []
-    success_count = 0
-    
-    for batch_id, success in results:
-        result_file = f"batch_{batch_id}_results.json"
-        if Path(result_file).exists():
-            try:
-                with open(result_file, 'r') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        all_results.extend(data)
-                    success_count += len(data) if isinstance(data, list) else 1
-            except Exception as e:
-                print(f"Error reading batch {batch_id}: {e}")
-    
-    # Save final results
-    with open('parallel_analysis_results.json', 'w') as f:
-        json.dump(all_results, f, indent=2)
-    
-    # Cleanup temp files
-    for batch_id, _ in results:
-        for file_type in ['input', 'results']:
-            file_path = Path(f"batch_{batch_id}_{file_type}.json")
-            if file_path.exists():
-                file_path.unlink()
+    analyzed = convert_jsonl_to_json(stream_file, output_file)
+    os.remove(stream_file)
     
     print(f"\n{'='*60}")
     print(f"Complete!")
     print(f"Time: {elapsed/60:.1f} minutes")
-    print(f"Companies analyzed: {len(all_results)}")
-    print(f"Speedup: {num_workers}x faster than sequential")
-    print(f"Results saved to: parallel_analysis_results.json")
+    print(f"Companies analyzed: {analyzed}")
+    print(f"Results saved to: {output_file}")
     print(f"{'='*60}")
 
 
@@ -110,15 +44,7 @@ if __name__ == "__main__":
     
     input_file = "../dataset_crawler-google-places_2026-01-22_05-33-25-536.json"
     
-    # Detect if running on cloud (more CPUs available)
-    cpu_cores = cpu_count()
-    print(f"Detected {cpu_cores} CPU cores")
-    
-    if cpu_cores >= 8:
-        workers = 10  # Cloud instance
-        print("Cloud environment detected - using 10 workers")
-    else:
-        workers = min(4, cpu_cores)  # Local machine
-        print(f"Local machine - using {workers} workers")
+    # Sites in flight; each holds one browser page (~50-100 MB), so size to RAM, not CPUs
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 10
     
     run_parallel(input_file, num_workers=workers)
@@ -4,12 +4,15 @@ Combines multiple analyzers for comprehensive testing
 """
 
 import asyncio
-import json
 import subprocess
 import sys
 from pathlib import Path
 from typing import Dict, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
+from itertools import islice
+
+from json_io import iter_analyzed, dump_json
+from worker_pool import process_stream
 
 try:
     from playwright.async_api import async_playwright
@@ -17,6 +20,12 @@ except ImportError:
     print("pip install playwright")
     sys.exit(1)
 
+from page_ready import wait_until_settled
+
+
+# Sites checked at once (each check runs heavy page JS, so keep this modest)
+MAX_CONCURRENT_CHECKS = 4
+
 
 @dataclass
 class QualityReport:
@@ -25,10 +34,10 @@ class QualityReport:
     company_name: str
     
     # Broken features
-    broken_links: List[str] = None
-    console_errors: List[str] = None
+    broken_links: List[str] = field(default_factory=list)
+    console_errors: List[str] = field(default_factory=list)
     missing_alt_text: int = 0
-    failed_requests: List[str] = None
+    failed_requests: List[str] = field(default_factory=list)
     
     # Design issues
     horizontal_scroll: bool = False
@@ -44,13 +53,9 @@ class QualityReport:
     critical_issues: int = 0
     warnings: int = 0
     
-    def __post_init__(self):
-        if self.broken_links is None:
-            self.broken_links = []
-        if self.console_errors is None:
-            self.console_errors = []
-        if self.failed_requests is None:
-            self.failed_requests = []
+    def to_dict(self) -> Dict:
+        # Shallow copy: the report is dumped once, so asdict()'s deep copy of the lists is wasted
+        return dict(vars(self))
 
 
 class QualityChecker:
@@ -58,153 +63,181 @@ class QualityChecker:
     
     def __init__(self):
         self.issues = []
+        # Shared by every check when used as `async with`
+        self.playwright = None
+        self.browser = None
+    
+    async def __aenter__(self):
+        """Launch one browser for all checks (each site gets its own context)"""
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=True, args=['--disable-gpu', '--disable-dev-shm-usage'])
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.browser.close()
+        await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
     
     async def check_website(self, url: str, company_name: str) -> QualityReport:
         """Run comprehensive quality checks"""
         report = QualityReport(url=url, company_name=company_name)
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
+        # Collect errors
+        console_errors = []
+        failed_requests = []
+        
+        # Certificate problems shouldn't stop the rest of the checks from running
+        context = await self.browser.new_context(viewport={'width': 1280, 'height': 800},
+                                                 ignore_https_errors=True)
+        page = await context.new_page()
+        
+        page.on("console", lambda msg: console_errors.append(msg.text) 
+                if msg.type == "error" else None)
+        page.on("requestfailed", lambda req: failed_requests.append(req.url))
+        
+        try:
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            await wait_until_settled(page)
             
-            # Collect errors
-            console_errors = []
-            failed_requests = []
+            # 1. Check broken links (internal tool)
+            report.broken_links = await self._find_broken_links(page, url)
             
-            page = await browser.new_page(viewport={'width': 1280, 'height': 800})
+            # 2-3. Check design issues and accessibility basics
+            page_data = await self._analyze_page(page)
+            report.horizontal_scroll = page_data.get('horizontal_scroll', False)
+            report.tiny_text_count = page_data.get('tiny_text_count', 0)
+            report.color_count = page_data.get('color_count', 0)
+            report.font_count = page_data.get('font_count', 0)
+            report.missing_alt_text = page_data.get('missing_alt', 0)
+            report.accessibility_score = page_data.get('score', 0)
+            report.low_contrast_warnings = page_data.get('contrast_issues', 0)
             
-            page.on("console", lambda msg: console_errors.append(msg.text) 
-                    if msg.type == "error" else None)
-            page.on("requestfailed", lambda req: failed_requests.append(req.url))
+            # 4. Console errors
+            report.console_errors = console_errors[:10]  # First 10
+            report.failed_requests = failed_requests
             
-            try:
-                await page.goto(url, wait_until='networkidle', timeout=30000)
-                await page.wait_for_timeout(2000)
-                
-                # 1. Check broken links (internal tool)
-                report.broken_links = await self._find_broken_links(page, url)
-                
-                # 2. Check design issues
-                design_data = await self._analyze_design(page)
-                report.horizontal_scroll = design_data.get('horizontal_scroll', False)
-                report.tiny_text_count = design_data.get('tiny_text_count', 0)
-                report.color_count = design_data.get('color_count', 0)
-                report.font_count = design_data.get('font_count', 0)
-                
-                # 3. Check accessibility basics
-                a11y_data = await self._check_accessibility(page)
-                report.missing_alt_text = a11y_data.get('missing_alt', 0)
-                report.accessibility_score = a11y_data.get('score', 0)
-                report.low_contrast_warnings = a11y_data.get('contrast_issues', 0)
-                
-                # 4. Console errors
-                report.console_errors = console_errors[:10]  # First 10
-                report.failed_requests = failed_requests
-                
-                # Calculate totals
-                report.critical_issues = (
-                    len(report.broken_links) + 
-                    len(report.failed_requests) +
-                    (1 if report.horizontal_scroll else 0)
-                )
-                report.warnings = (
-                    len(report.console_errors) +
-                    report.missing_alt_text +
-                    report.tiny_text_count
-                )
-                
-            except Exception as e:
-                print(f"Error checking {url}: {e}")
+            # Calculate totals
+            report.critical_issues = (
+                len(report.broken_links) + 
+                len(report.failed_requests) +
+                (1 if report.horizontal_scroll else 0)
+            )
+            report.warnings = (
+                len(report.console_errors) +
+                report.missing_alt_text +
+                report.tiny_text_count
+            )
             
-            await browser.close()
+        except Exception as e:
+            print(f"Error checking {url}: {e}")
+        finally:
+            await context.close()
         
         return report
     
     async def _find_broken_links(self, page, base_url: str) -> List[str]:
         """Find broken links on the page"""
-        broken = []
-        
+        # Unique links without #fragments, so the 15-link cap isn't spent on duplicates
         links = await page.eval_on_selector_all('a[href]', '''
-            links => links
-                .map(a => a.href)
-                .filter(href => href.startsWith('http'))
-                .slice(0, 15)  # Check first 15
+            links => [...new Set(links
+                .map(a => a.href.split('#')[0])
+                .filter(href => href.startsWith('http')))]
+                .slice(0, 15)  // Check first 15
         ''')
         
-        for link in links:
+        async def check(link: str):
             try:
-                response = await page.context.request.fetch(link, method='HEAD', timeout=10000)
+                response = await page.context.request.fetch(link, method='HEAD', timeout=5000)
                 if response.status >= 400:
-                    broken.append(f"{link} (Status: {response.status})")
+                    return f"{link} (Status: {response.status})"
             except Exception:
-                broken.append(f"{link} (Failed to load)")
+                return f"{link} (Failed to load)"
+            return None
         
-        return broken
+        # All HEADs in flight at once: the wait is the slowest link, not the sum
+        results = await asyncio.gather(*(check(link) for link in links))
+        return [result for result in results if result]
     
-    async def _analyze_design(self, page) -> Dict:
-        """Analyze design issues"""
+    async def _analyze_page(self, page) -> Dict:
+        """Design and accessibility checks in one DOM walk and one round-trip"""
         return await page.evaluate("""() => {
-            const results = {
-                colors: new Set(),
-                fonts: new Set(),
-                tiny_text_count: 0,
-                horizontal_scroll: false
-            };
-            
-            // Check all elements
-            document.querySelectorAll('*').forEach(el => {
-                const style = window.getComputedStyle(el);
-                
-                results.colors.add(style.color);
-                results.colors.add(style.backgroundColor);
-                results.fonts.add(style.fontFamily);
-                
-                const fontSize = parseInt(style.fontSize);
-                if (fontSize < 12) results.tiny_text_count++;
-            });
-            
-            // Check horizontal scroll
-            results.horizontal_scroll = document.documentElement.scrollWidth > window.innerWidth;
+            const colors = new Set();
+            const fonts = new Set();
+            const CONTRAST_TAGS = new Set(['P', 'SPAN', 'A', 'H1', 'H2', 'H3', 'H4']);
+            let tinyTextCount = 0;
+            let missingAlt = 0;
+            let contrastIssues = 0;
             
-            return {
-                color_count: results.colors.size,
-                font_count: results.fonts.size,
-                tiny_text_count: results.tiny_text_count,
-                horizontal_scroll: results.horizontal_scroll
+            // WCAG 2.1 contrast ratio from computed rgb()/rgba() colors
+            const parseRgb = c => {
+                const m = c.match(/rgba?\\(([^)]+)\\)/);
+                if (!m) return null;
+                const [r, g, b, a = 1] = m[1].split(',').map(parseFloat);
+                return {r, g, b, a};
             };
-        }""")
-    
-    async def _check_accessibility(self, page) -> Dict:
-        """Basic accessibility checks"""
-        return await page.evaluate("""() => {
-            const issues = {
-                missing_alt: 0,
-                contrast_issues: 0,
-                score: 100
+            const luminance = ({r, g, b}) => {
+                const lin = v => {
+                    const c = v / 255;
+                    return c <= 0.03928 ? c / 12.92 : ((c + 0.055) / 1.055) ** 2.4;
+                };
+                return 0.2126 * lin(r) + 0.7152 * lin(g) + 0.0722 * lin(b);
+            };
+            // Nearest ancestor with a non-transparent background (memoized)
+            const bgCache = new Map();
+            const effectiveBg = el => {
+                if (!el || el.nodeType !== 1) return {r: 255, g: 255, b: 255, a: 1};
+                if (bgCache.has(el)) return bgCache.get(el);
+                const bg = parseRgb(window.getComputedStyle(el).backgroundColor);
+                const result = bg && bg.a > 0 ? bg : effectiveBg(el.parentElement);
+                bgCache.set(el, result);
+                return result;
             };
             
-            // Missing alt text
-            document.querySelectorAll('img').forEach(img => {
-                if (!img.alt) issues.missing_alt++;
-            });
+            // Pages use a handful of distinct font sizes; parse each string once
+            const sizeCache = new Map();
+            const pxSize = str => {
+                let px = sizeCache.get(str);
+                if (px === undefined) { px = parseFloat(str); sizeCache.set(str, px); }
+                return px;
+            };
             
-            // Basic contrast check (simplified)
-            document.querySelectorAll('p, span, a, h1, h2, h3, h4').forEach(el => {
-                const style = window.getComputedStyle(el);
-                const color = style.color;
-                const bg = style.backgroundColor;
+            const all = document.querySelectorAll('*');
+            for (let i = 0, n = all.length; i < n; i++) {
+                const el = all[i];
+                const style = getComputedStyle(el);
+                
+                colors.add(style.color);
+                colors.add(style.backgroundColor);
+                fonts.add(style.fontFamily);
+                
+                const fontSize = pxSize(style.fontSize);
+                if (fontSize < 12) tinyTextCount++;
                 
-                // If light text on light background (simplified check)
-                if (color.includes('200') || color.includes('255')) {
-                    if (bg.includes('255') || bg.includes('transparent')) {
-                        issues.contrast_issues++;
+                if (el.tagName === 'IMG') {
+                    if (!el.alt) missingAlt++;
+                } else if (CONTRAST_TAGS.has(el.tagName)) {
+                    // AA needs 4.5:1 for body text, 3:1 for large text
+                    const fg = parseRgb(style.color);
+                    if (fg) {
+                        const l1 = luminance(fg), l2 = luminance(effectiveBg(el));
+                        const ratio = (Math.max(l1, l2) + 0.05) / (Math.min(l1, l2) + 0.05);
+                        const large = fontSize >= 24 || (fontSize >= 18.66 && parseInt(style.fontWeight) >= 700);
+                        if (ratio < (large ? 3 : 4.5)) contrastIssues++;
                     }
                 }
-            });
+            }
             
-            // Calculate score
-            issues.score = Math.max(0, 100 - (issues.missing_alt * 3) - (issues.contrast_issues * 2));
-            
-            return issues;
+            return {
+                color_count: colors.size,
+                font_count: fonts.size,
+                tiny_text_count: tinyTextCount,
+                horizontal_scroll: document.documentElement.scrollWidth > window.innerWidth,
+                missing_alt: missingAlt,
+                contrast_issues: contrastIssues,
+                score: Math.max(0, 100 - (missingAlt * 3) - (contrastIssues * 2))
+            };
         }""")
 
 
@@ -241,28 +274,28 @@ def print_report(report: QualityReport):
 async def main():
     """Run quality checks on analysis results"""
     
-    # Load companies
-    with open('analysis_results.json', 'r') as f:
-        companies = json.load(f)[:3]  # First 3
+    # Load companies (streamed, so only the first few are parsed)
+    companies = list(islice(iter_analyzed('analysis_results.json'), 3))  # First 3 reachable sites
     
     checker = QualityChecker()
-    reports = []
     
     print("Running Quality Checks...")
     print("=" * 60)
     
-    for company in companies:
+    async def check_one(i: int, company: Dict):
         url = company.get('url', company.get('website', ''))
         if not url:
-            continue
+            return None
         
         report = await checker.check_website(url, company['company_name'])
         print_report(report)
-        reports.append(asdict(report))
+        return report.to_dict()
+    
+    async with checker:
+        reports = await process_stream(companies, check_one, concurrency=MAX_CONCURRENT_CHECKS)
     
     # Save results
-    with open('quality_reports.json', 'w') as f:
-        json.dump(reports, f, indent=2)
+    dump_json(reports, 'quality_reports.json')
     
     print(f"\n\nSaved to: quality_reports.json")
 
@@ -4,6 +4,7 @@ Setup script for GitHub Actions deployment
 Automates git initialization and pushing to GitHub
 """
 
+import shlex
 import subprocess
 import sys
 import os
@@ -11,12 +12,14 @@ from pathlib import Path
 
 
 def run_cmd(cmd, description=""):
-    """Run shell command and show output"""
+    """Run a command (argument list, or a string split like a shell would) without a shell"""
+    if isinstance(cmd, str):
+        cmd = shlex.split(cmd)
     if description:
         print(f"\n>>> {description}")
-    print(f"Running: {cmd}")
+    print(f"Running: {shlex.join(cmd)}")
     
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.stdout:
         print(result.stdout)
@@ -29,7 +32,7 @@ def run_cmd(cmd, description=""):
 
 def check_git_installed():
     """Check if git is installed"""
-    result = subprocess.run("git --version", shell=True, capture_output=True, text=True)
+    result = subprocess.run(["git", "--version"], capture_output=True, text=True)
     if result.returncode != 0:
         print("ERROR: Git is not installed!")
         print("Download from: https://git-scm.com/downloads")
@@ -70,22 +73,23 @@ def main():
     # Initialize git if not already
     if not Path(".git").exists():
         print("\n[1/5] Initializing git repository...")
-        if not run_cmd("git init", "Creating git repo"):
+        if not run_cmd(["git", "init"], "Creating git repo"):
             return 1
     else:
         print("\n[1/5] Git repository already exists")
     
     # Add all files
     print("\n[2/5] Adding files to git...")
-    run_cmd("git add .", "Adding files")
+    run_cmd(["git", "add", "."], "Adding files")
     
     # Commit
     print("\n[3/5] Committing...")
-    run_cmd('git commit -m "Add website analyzer for GitHub Actions"', "Creating commit")
+    run_cmd(["git", "commit", "-m", "Add website analyzer for GitHub Actions"], "Creating commit")
     
-    # Check for remote
-    result = subprocess.run("git remote -v", shell=True, capture_output=True, text=True)
-    if "github.com" not in result.stdout:
+    # Check for remote (the URL is reused for the instructions at the end)
+    result = subprocess.run(["git", "remote", "get-url", "origin"], capture_output=True, text=True)
+    repo_url = result.stdout.strip()
+    if "github.com" not in repo_url:
         print("\n[4/5] Adding GitHub remote...")
         print("\n*** IMPORTANT ***")
         print("Create a repository on GitHub first:")
@@ -101,7 +105,7 @@ def main():
             print("No URL provided. Setup incomplete.")
             return 1
         
-        if not run_cmd(f"git remote add origin {repo_url}", "Adding remote"):
+        if not run_cmd(["git", "remote", "add", "origin", repo_url], "Adding remote"):
             return 1
     else:
         print("\n[4/5] GitHub remote already configured")
@@ -109,24 +113,18 @@ def main():
     # Push
     print("\n[5/5] Pushing to GitHub...")
     
-    # Try main first, then master
-    if not run_cmd("git push -u origin main", "Pushing to main branch"):
-        print("Trying 'master' branch...")
-        if not run_cmd("git push -u origin master", "Pushing to master branch"):
-            print("[!] Push failed. You may need to:")
-            print("  1. Check your GitHub credentials")
-            print("  2. Try manually: git push -u origin main")
-            return 1
+    # Push whichever branch is checked out (main or master) in one go
+    if not run_cmd(["git", "push", "-u", "origin", "HEAD"], "Pushing current branch"):
+        print("[!] Push failed. You may need to:")
+        print("  1. Check your GitHub credentials")
+        print("  2. Try manually: git push -u origin main")
+        return 1
     
     # Success
     print("\n" + "="*70)
     print("SUCCESS! Repository pushed to GitHub")
     print("="*70)
     
-    # Get remote URL for instructions
-    result = subprocess.run("git remote get-url origin", shell=True, capture_output=True, text=True)
-    repo_url = result.stdout.strip()
-    
     # Convert SSH to HTTPS URL if needed
     if repo_url.startswith("git@github.com:"):
         repo_url = repo_url.replace("git@github.com:", "https://github.com/")
@@ -4,82 +4,143 @@ Use this if you just want to screenshot existing websites
 """
 
 import asyncio
+import functools
+from itertools import islice
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 
+from json_io import iter_analyzed, dump_json
+from slugs import make_slug
+from worker_pool import process_stream
+
 try:
-    from playwright.async_api import async_playwright
+    from playwright.async_api import Browser, async_playwright
 except ImportError:
     print("pip install playwright && playwright install chromium")
     raise
 
+from page_ready import wait_until_settled
+
+
+# Companies compared at once (two pages each: current and new site)
+MAX_CONCURRENT_COMPARISONS = 4
+
+# Screenshot size, and the size every comparison image is normalized to
+SHOT_SIZE = (1280, 2000)
+
+# Whole-shot budget (load, settle, capture), after which a placeholder is used instead
+SHOT_TIMEOUT = 25
+# Default for each individual page operation
+PAGE_TIMEOUT_MS = 15000
+
+
+@functools.lru_cache(maxsize=8)
+def _get_font(size: int):
+    """Arial at `size` (Pillow's default font if unavailable), loaded once per size"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
 
-async def screenshot_website(url: str, output_path: Path, width: int = 1280, height: int = 2000):
-    """Take a screenshot of a website"""
+
+def _load_shot(img) -> Image.Image:
+    """An RGB image at SHOT_SIZE from a path or an already decoded image (resized only if needed)"""
+    if not isinstance(img, Image.Image):
+        img = Image.open(img)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size != SHOT_SIZE:
+        img = img.resize(SHOT_SIZE, Image.Resampling.LANCZOS)
+    return img
+
+
+def _create_placeholder(path: Path, size: tuple, text: str = "Unavailable"):
+    """Plain stand-in for a screenshot that couldn't be taken"""
+    img = Image.new('RGB', size, '#f3f4f6')
+    draw = ImageDraw.Draw(img)
+    draw.text((size[0] // 2 - 100, size[1] // 2), text, fill='#6b7280', font=_get_font(32))
+    img.save(path, quality=85)
+
+
+async def screenshot_website(url: str, output_path: Path, browser: Browser,
+                             width: int = SHOT_SIZE[0], height: int = SHOT_SIZE[1]):
+    """Take a screenshot of a website in its own page (and context) on `browser`"""
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(viewport={'width': width, 'height': height})
-        
+    page = await browser.new_page(viewport={'width': width, 'height': height})
+    page.set_default_timeout(PAGE_TIMEOUT_MS)
+    
+    async def capture():
+        await page.goto(url, wait_until='domcontentloaded', timeout=20000)
         try:
-            print(f"  Loading {url}...")
-            await page.goto(url, wait_until='networkidle', timeout=45000)
-            await page.wait_for_timeout(3000)  # Let animations/content load
-            
-            # Screenshot
-            await page.screenshot(path=str(output_path), full_page=False)
-            print(f"  Saved: {output_path}")
-            
-        except Exception as e:
-            print(f"  Error: {e}")
+            await page.wait_for_selector('main, header, h1', timeout=5000)
+        except Exception:
+            pass  # No landmark element; settle below still gives content a chance
+        await wait_until_settled(page)  # Instead of networkidle plus a fixed 3s sleep
+        
+        # Screenshot in CSS pixels, so it is exactly the viewport size (SHOT_SIZE by
+        # default) even on HiDPI setups and _load_shot never has to resample it.
+        # JPEG: these only feed the comparison images, and encode far faster than PNG.
+        await page.screenshot(path=str(output_path), type='jpeg', quality=85, full_page=False, scale='css')
+    
+    try:
+        print(f"  Loading {url}...")
+        # A dangling site gets cut off instead of holding its worker slot
+        await asyncio.wait_for(capture(), timeout=SHOT_TIMEOUT)
+        print(f"  Saved: {output_path}")
         
-        await browser.close()
+    except asyncio.TimeoutError:
+        print(f"  Timed out after {SHOT_TIMEOUT}s: {url}")
+        _create_placeholder(output_path, (width, height), "Timed out")
+    except Exception as e:
+        print(f"  Error: {e}")
+        _create_placeholder(output_path, (width, height))
+    finally:
+        await page.close()
     
     return output_path
 
 
-def create_gif(image_paths: list, output_path: Path, duration: int = 2000):
-    """Create animated GIF from images"""
+def create_gif(images: list, output_path: Path, duration: int = 2000):
+    """Create animated GIF from images (paths or decoded images)"""
+    
+    # Ensure consistent size
+    images = [_load_shot(img) for img in images]
     
-    images = []
-    for path in image_paths:
-        img = Image.open(path)
-        # Ensure consistent size
-        img = img.resize((1280, 2000), Image.Resampling.LANCZOS)
-        images.append(img.convert('RGB'))
+    # One shared palette (fast octree) from a quarter-size strip of every frame, so
+    # each frame's colors count; frames are then mapped to it without dithering
+    thumbs = [img.reduce(4) for img in images]
+    strip = Image.new('RGB', (sum(t.width for t in thumbs), thumbs[0].height))
+    for i, thumb in enumerate(thumbs):
+        strip.paste(thumb, (i * thumbs[0].width, 0))
+    palette = strip.quantize(256, method=Image.Quantize.FASTOCTREE)
+    frames = [img.quantize(palette=palette, dither=Image.Dither.NONE) for img in images]
     
-    images[0].save(
+    frames[0].save(
         output_path,
         save_all=True,
-        append_images=images[1:],
+        append_images=frames[1:],
         duration=duration,
-        loop=0
+        loop=0,
+        optimize=False
     )
     print(f"GIF saved: {output_path}")
 
 
-def create_side_by_side(img1_path: Path, img2_path: Path, output_path: Path, title: str = None):
-    """Create side-by-side comparison"""
-    
-    img1 = Image.open(img1_path)
-    img2 = Image.open(img2_path)
+def create_side_by_side(img1, img2, output_path: Path, title: str = None):
+    """Create side-by-side comparison (from paths or decoded images)"""
     
     # Resize to same height
-    target_height = 2000
-    img1 = img1.resize((1280, target_height), Image.Resampling.LANCZOS)
-    img2 = img2.resize((1280, target_height), Image.Resampling.LANCZOS)
+    target_height = SHOT_SIZE[1]
+    img1 = _load_shot(img1)
+    img2 = _load_shot(img2)
     
     # Create combined
     gap = 20
     combined = Image.new('RGB', (1280 * 2 + gap, target_height + 150), '#f5f5f5')
     
     draw = ImageDraw.Draw(combined)
-    try:
-        title_font = ImageFont.truetype("arial.ttf", 36)
-        label_font = ImageFont.truetype("arial.ttf", 28)
-    except:
-        title_font = ImageFont.load_default()
-        label_font = ImageFont.load_default()
+    title_font = _get_font(36)
+    label_font = _get_font(28)
     
     # Title
     if title:
@@ -95,73 +156,86 @@ def create_side_by_side(img1_path: Path, img2_path: Path, output_path: Path, tit
     combined.paste(img1, (0, 150))
     combined.paste(img2, (1280 + gap, 150))
     
-    combined.save(output_path, quality=95)
+    # Lossy WebP (pick the format with the suffix, normally .webp): far faster to
+    # encode than PNG's DEFLATE at this size, and several times smaller
+    combined.save(output_path, quality=90, method=4)
     print(f"Comparison saved: {output_path}")
 
 
-async def compare_two_urls(old_url: str, new_url: str, company_name: str, output_dir: str = "./comparisons"):
-    """Compare two websites side by side"""
+async def compare_two_urls(old_url: str, new_url: str, company_name: str, output_dir: str = "./comparisons",
+                           browser: Browser = None):
+    """Compare two websites side by side (on `browser`, or a browser of its own)"""
+    
+    if browser is None:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                return await compare_two_urls(old_url, new_url, company_name, output_dir, browser)
+            finally:
+                await browser.close()
     
     out = Path(output_dir)
-    out.mkdir(exist_ok=True)
+    out.mkdir(parents=True, exist_ok=True)
     
-    safe_name = "".join(c for c in company_name if c.isalnum() or c in ' -_').strip().replace(' ', '-').lower()
-    comp_dir = out / safe_name
+    comp_dir = out / make_slug(company_name)
     comp_dir.mkdir(exist_ok=True)
     
     print(f"\nComparing: {company_name}")
     print("-" * 50)
     
-    # Screenshot both
-    old_img = comp_dir / "current.png"
-    new_img = comp_dir / "new_design.png"
+    # Screenshot both at once
+    old_img = comp_dir / "current.jpg"
+    new_img = comp_dir / "new_design.jpg"
     
-    await screenshot_website(old_url, old_img)
-    await screenshot_website(new_url, new_img)
+    await asyncio.gather(screenshot_website(old_url, old_img, browser),
+                         screenshot_website(new_url, new_img, browser))
     
-    # Create comparisons
-    create_side_by_side(old_img, new_img, comp_dir / "comparison.png", company_name)
-    create_gif([old_img, new_img], comp_dir / "animated.gif")
+    # Create comparisons (each screenshot decoded once, shared by both)
+    shots = [_load_shot(old_img), _load_shot(new_img)]
+    create_side_by_side(*shots, comp_dir / "comparison.webp", company_name)
+    create_gif(shots, comp_dir / "animated.gif")
     
     print(f"Results in: {comp_dir}")
     return comp_dir
 
 
 async def batch_compare(companies: list, new_url_base: str = "http://localhost:3000"):
-    """Compare multiple companies"""
-    
-    all_results = []
+    """Compare multiple companies, several at once on one shared browser"""
     
-    for company in companies:
+    async def compare_one(i: int, company: dict):
         comp_dir = await compare_two_urls(
             old_url=company['website'],
             new_url=new_url_base,
-            company_name=company['name']
+            company_name=company['name'],
+            browser=browser
         )
-        all_results.append({
+        return {
             'company_name': company['name'],
             'website': company['website'],
             'folder': str(comp_dir),
             'gif': str(comp_dir / "animated.gif"),
-            'comparison': str(comp_dir / "comparison.png"),
-            'old_screenshot': str(comp_dir / "current.png"),
-            'new_screenshot': str(comp_dir / "new_design.png")
-        })
+            'comparison': str(comp_dir / "comparison.webp"),
+            'old_screenshot': str(comp_dir / "current.jpg"),
+            'new_screenshot': str(comp_dir / "new_design.jpg")
+        }
+    
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            all_results = await process_stream(companies, compare_one, concurrency=MAX_CONCURRENT_COMPARISONS)
+        finally:
+            await browser.close()
     
     # Save manifest
-    with open('comparisons/screenshot_manifest.json', 'w') as f:
-        json.dump(all_results, f, indent=2)
+    dump_json(all_results, 'comparisons/screenshot_manifest.json')
     
     print(f"\nManifest saved to: comparisons/screenshot_manifest.json")
     return all_results
 
 
 if __name__ == "__main__":
-    import json
-    
     # Example: Compare from analysis results
-    with open('analysis_results.json') as f:
-        data = json.load(f)[:3]  # First 3
+    data = list(islice(iter_analyzed('analysis_results.json'), 3))  # First 3 reachable sites
     
     companies = [{
         'name': d['company_name'],
@@ -3,13 +3,65 @@ Site Generator - Creates white-labeled tour websites
 Customizes only header/home content, keeps products intact
 """
 
-import json
+import io
 import os
+import re
 import shutil
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
-from slugify import slugify
+
+from json_io import dump_json, iter_analyzed
+from slugs import make_slug
+
+
+# Build artifacts and git metadata never copied into generated sites
+TEMPLATE_IGNORE = {'node_modules', '.next', '.vercel', '.git'}
+
+# Our own archive, so extract as is (the filter argument only exists on newer Pythons)
+_EXTRACT_OPTIONS = {'filter': 'fully_trusted'} if hasattr(tarfile, 'fully_trusted_filter') else {}
+
+# layout.tsx's metadata object: the text between these markers is regenerated per company
+METADATA_MARKERS = (b'export const metadata: Metadata = {', b'};')
+
+# Template text that the _customize_* methods swap out, per file
+TEMPLATE_TEXT = {
+    'hero': {
+        'tagline': 'Rome, Curated.',
+        'subtitle': "Private access to the Colosseum, Vatican, and hidden gems. Experience Rome without the crowds.",
+    },
+    'footer': {
+        'brand': 'Tickets in <span className="text-emerald-500">Rome</span>',
+        'description': "Your premier gateway to the Eternal City. Experience Rome with our expert guides, skip-the-line access, and unforgettable customized journeys.",
+        'phone': '+39 351 419 9425',
+        'email': 'info@ticketsinrome.com',
+        'address': 'Via Tunisi 43,<br />Rome, Italy',
+        'copyright': 'Tickets in Rome. All rights reserved.',
+        'details': '<span className="font-medium text-stone-500">Tickets in Rome</span>',
+    },
+    'page': {
+        'vatican': 'Skip the line to the Sistine Chapel, Gardens, and the Dome.',
+        'colosseum': 'Walk in the footsteps of Gladiators. Arena, Underground, and Forum.',
+        'squares': 'Explore the Pantheon, Trevi Fountain, Spanish Steps and iconic squares.',
+    },
+}
+# Compiled once: one alternation per file, plus matched text -> key
+# (over UTF-8 bytes, so file contents are never decoded)
+TEMPLATE_PATTERNS = {name: re.compile(b'|'.join(re.escape(text.encode('utf-8')) for text in texts.values()))
+                     for name, texts in TEMPLATE_TEXT.items()}
+TEMPLATE_KEYS = {name: {text.encode('utf-8'): key for key, text in texts.items()}
+                 for name, texts in TEMPLATE_TEXT.items()}
+
+
+def _substitute(name: str, content: bytes, values: Dict[str, str]) -> bytes:
+    """Swap `name`'s template text in one pass; text without an entry in `values` is left as is"""
+    keys = TEMPLATE_KEYS[name]
+    encoded = {key: value.encode('utf-8') for key, value in values.items()}
+    return TEMPLATE_PATTERNS[name].sub(lambda m: encoded.get(keys[m.group(0)], m.group(0)), content)
 
 
 @dataclass
@@ -31,41 +83,78 @@ class SiteGenerator:
     def __init__(self, template_path: str, output_base_path: str):
         self.template_path = Path(template_path)
         self.output_base_path = Path(output_base_path)
+        # The template is walked once; every site is unpacked from this in-memory tarball
+        self._template_tar = self._pack_template()
+        # layout.tsx around its metadata body, located once since it's the same for every site
+        self._layout_parts = self._split_layout()
+    
+    def _split_layout(self) -> Optional[Tuple[bytes, bytes]]:
+        """Template layout.tsx up to and from the metadata markers, or None if it has none"""
+        layout_path = self.template_path / "src" / "app" / "layout.tsx"
+        if not layout_path.exists():
+            return None
+        content = layout_path.read_bytes()
+        
+        start_marker, end_marker = METADATA_MARKERS
+        start_idx = content.find(start_marker)
+        if start_idx == -1:
+            return None
+        
+        end_idx = content.find(end_marker, start_idx + len(start_marker))
+        if end_idx == -1:
+            return None
+        
+        return content[:start_idx + len(start_marker)], content[end_idx:]
+    
+    def _pack_template(self) -> bytes:
+        """Uncompressed tarball of the template, minus TEMPLATE_IGNORE entries"""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            for child in sorted(self.template_path.iterdir()):
+                tar.add(child, arcname=child.name,
+                        filter=lambda info: None if os.path.basename(info.name) in TEMPLATE_IGNORE else info)
+        return buffer.getvalue()
         
     def generate_site(self, company: CompanyInfo) -> str:
         """Generate a new site for a company"""
         
         # Create output directory
-        safe_name = slugify(company.name)
+        safe_name = make_slug(company.name)
         output_dir = self.output_base_path / safe_name
         
-        # Remove if exists
+        # Remove if exists: move it aside (instant) and delete it in the background.
+        # Not a daemon thread, so the interpreter finishes the delete before exiting.
         if output_dir.exists():
-            shutil.rmtree(output_dir)
-        
-        # Copy template (ignore build artifacts and git)
-        def ignore_patterns(dir, files):
-            return shutil.ignore_patterns('node_modules', '.next', '.vercel', '.git')(dir, files)
+            trash = output_dir.with_name(f"{output_dir.name}.old.{os.getpid()}.{time.monotonic_ns()}")
+            output_dir.rename(trash)
+            threading.Thread(target=shutil.rmtree, args=(trash,), kwargs={'ignore_errors': True}).start()
+        
+        # Template file -> customizer, applied in memory as the file is unpacked
+        customizers = {
+            'src/app/layout.tsx': self._customize_layout,
+            'src/components/Hero.tsx': self._customize_hero,
+            'src/components/Footer.tsx': self._customize_footer,
+            'src/app/page.tsx': self._customize_page_content,
+        }
         
-        shutil.copytree(self.template_path, output_dir, ignore=ignore_patterns)
+        # Copy template (build artifacts and git were left out when it was packed),
+        # writing customized files once instead of copying and then rewriting them
+        with tarfile.open(fileobj=io.BytesIO(self._template_tar)) as tar:
+            for member in tar:
+                customize = customizers.pop(member.name, None)
+                if customize is None:
+                    tar.extract(member, output_dir, **_EXTRACT_OPTIONS)
+                    continue
+                content = tar.extractfile(member).read()
+                (output_dir / member.name).write_bytes(customize(content, company))
         
-        # Customize files
-        self._customize_layout(output_dir, company)
-        self._customize_hero(output_dir, company)
-        self._customize_footer(output_dir, company)
-        self._customize_page_content(output_dir, company)
+        for name in customizers:
+            print(f"Warning: {name} not found")
         
         return str(output_dir)
     
-    def _customize_layout(self, output_dir: Path, company: CompanyInfo):
+    def _customize_layout(self, content: bytes, company: CompanyInfo) -> bytes:
         """Customize layout.tsx with company metadata"""
-        layout_path = output_dir / "src" / "app" / "layout.tsx"
-        
-        if not layout_path.exists():
-            print(f"Warning: layout.tsx not found at {layout_path}")
-            return
-        
-        content = layout_path.read_text(encoding='utf-8')
         
         # Generate new metadata
         title = f"{company.name} | Official Tours & Tickets"
@@ -73,11 +162,13 @@ class SiteGenerator:
         # Sanitize for JS string
         description = description.replace('\\', '\\').replace('"', '\\"').replace('\n', ' ').replace('\r', ' ').strip()[:200]
         
-        # Replace metadata
-        content = self._replace_between(content, 
-            'export const metadata: Metadata = {',
-            '};',
-            f'''  title: "{title}",
+        if self._layout_parts is None:
+            print("Warning: no metadata block in layout.tsx")
+            return content
+        
+        # Replace metadata (between the markers found when the template was loaded)
+        prefix, suffix = self._layout_parts
+        metadata = (f'''  title: "{title}",
   description: "{description}",
   icons: {{
     icon: '/logo.png',
@@ -87,112 +178,68 @@ class SiteGenerator:
   other: {{
     'viewport': 'width=device-width, initial-scale=1, maximum-scale=1',
   }}''')
+        content = prefix + b"\n" + metadata.encode('utf-8') + b"\n" + suffix
         
-        layout_path.write_text(content, encoding='utf-8')
         print(f"  [OK] Updated layout.tsx")
+        return content
     
-    def _customize_hero(self, output_dir: Path, company: CompanyInfo):
+    def _customize_hero(self, content: bytes, company: CompanyInfo) -> bytes:
         """Customize Hero component with company branding"""
-        hero_path = output_dir / "src" / "components" / "Hero.tsx"
-        
-        if not hero_path.exists():
-            print(f"Warning: Hero.tsx not found")
-            return
-        
-        content = hero_path.read_text(encoding='utf-8')
         
         # Generate tagline based on company name and description
         tagline = company.tagline or self._generate_tagline(company.name, company.description)
         subtitle = company.description[:150] if len(company.description) > 50 else \
             f"Private access to the Colosseum, Vatican, and hidden gems with {company.name}. Experience Rome without the crowds."
         
-        # Replace the default title/hero content
-        # Change "Rome, Curated." subtitle
-        content = content.replace(
-            'Rome, Curated.',
-            f'{company.name.split()[0]}, Curated.'
-        )
-        
-        # Replace the default subtitle
-        old_subtitle = "Private access to the Colosseum, Vatican, and hidden gems. Experience Rome without the crowds."
+        # Replace the default title/hero content: "Rome, Curated." and the subtitle
         subtitle = subtitle.replace('\n', ' ').replace('\r', ' ').replace('"', '\\"')[:200]
-        content = content.replace(old_subtitle, subtitle)
+        content = _substitute('hero', content, {
+            'tagline': f'{company.name.split()[0]}, Curated.',
+            'subtitle': subtitle,
+        })
         
-        hero_path.write_text(content, encoding='utf-8')
         print(f"  [OK] Updated Hero.tsx")
+        return content
     
-    def _customize_footer(self, output_dir: Path, company: CompanyInfo):
+    def _customize_footer(self, content: bytes, company: CompanyInfo) -> bytes:
         """Customize Footer with company contact info"""
-        footer_path = output_dir / "src" / "components" / "Footer.tsx"
-        
-        if not footer_path.exists():
-            print(f"Warning: Footer.tsx not found")
-            return
-        
-        content = footer_path.read_text(encoding='utf-8')
-        
-        # Update company name in footer
-        content = content.replace(
-            'Tickets in <span className="text-emerald-500">Rome</span>',
-            f'{company.name.split()[0]} <span className="text-emerald-500">{" ".join(company.name.split()[1:]) or "Tours"}</span>'
-        )
         
-        # Update description
-        old_desc = "Your premier gateway to the Eternal City. Experience Rome with our expert guides, skip-the-line access, and unforgettable customized journeys."
         new_desc = company.description or f"Your premier gateway to Rome. Experience the Eternal City with {company.name} - expert guides, skip-the-line access, and unforgettable journeys."
         new_desc = new_desc.replace('\n', ' ').replace('\r', ' ').replace('"', '\\"')[:180]
-        content = content.replace(old_desc, new_desc)
         
+        values = {
+            # Company name, description, copyright and company details
+            'brand': f'{company.name.split()[0]} <span className="text-emerald-500">{" ".join(company.name.split()[1:]) or "Tours"}</span>',
+            'description': new_desc,
+            'copyright': f'{company.name}. All rights reserved.',
+            'details': f'<span className="font-medium text-stone-500">{company.name}</span>',
+        }
         # Update contact info if available
         if company.phone:
-            content = content.replace('+39 351 419 9425', company.phone)
+            values['phone'] = company.phone
         if company.email:
-            content = content.replace('info@ticketsinrome.com', company.email)
+            values['email'] = company.email
         if company.address:
-            content = content.replace('Via Tunisi 43,<br />Rome, Italy', company.address.replace(', ', '<br />'))
-        
-        # Update copyright
-        content = content.replace(
-            'Tickets in Rome. All rights reserved.',
-            f'{company.name}. All rights reserved.'
-        )
+            values['address'] = company.address.replace(', ', '<br />')
         
-        # Update company details
-        content = content.replace(
-            '<span className="font-medium text-stone-500">Tickets in Rome</span>',
-            f'<span className="font-medium text-stone-500">{company.name}</span>'
-        )
+        # One scan over the file for all of them
+        content = _substitute('footer', content, values)
         
-        footer_path.write_text(content, encoding='utf-8')
         print(f"  [OK] Updated Footer.tsx")
+        return content
     
-    def _customize_page_content(self, output_dir: Path, company: CompanyInfo):
+    def _customize_page_content(self, content: bytes, company: CompanyInfo) -> bytes:
         """Customize main page content - section titles"""
-        page_path = output_dir / "src" / "app" / "page.tsx"
-        
-        if not page_path.exists():
-            print(f"Warning: page.tsx not found")
-            return
-        
-        content = page_path.read_text(encoding='utf-8')
         
         # Customize section titles to be more generic/company-branded
-        replacements = {
-            'Skip the line to the Sistine Chapel, Gardens, and the Dome.':
-                f'Discover the Vatican with {company.name}. Skip-the-line to the Sistine Chapel, Gardens, and the Dome.',
-            
-            'Walk in the footsteps of Gladiators. Arena, Underground, and Forum.':
-                f'Walk in the footsteps of Gladiators with {company.name}. Arena, Underground, and Forum access.',
-            
-            'Explore the Pantheon, Trevi Fountain, Spanish Steps and iconic squares.':
-                f'Explore Rome\'s iconic squares with {company.name}. Pantheon, Trevi Fountain, Spanish Steps and more.',
-        }
-        
-        for old, new in replacements.items():
-            content = content.replace(old, new)
+        content = _substitute('page', content, {
+            'vatican': f'Discover the Vatican with {company.name}. Skip-the-line to the Sistine Chapel, Gardens, and the Dome.',
+            'colosseum': f'Walk in the footsteps of Gladiators with {company.name}. Arena, Underground, and Forum access.',
+            'squares': f'Explore Rome\'s iconic squares with {company.name}. Pantheon, Trevi Fountain, Spanish Steps and more.',
+        })
         
-        page_path.write_text(content, encoding='utf-8')
         print(f"  [OK] Updated page.tsx")
+        return content
     
     def _generate_tagline(self, name: str, description: str) -> str:
         """Generate a catchy tagline"""
@@ -203,63 +250,67 @@ class SiteGenerator:
             f"Rome's Best Tours with {name}",
         ]
         return taglines[0]
+
+
+def _generate_one(generator: SiteGenerator, result: Dict, label: str) -> Optional[Dict]:
+    """Generate one company's site; its manifest entry, or None on failure"""
+    company = CompanyInfo(
+        name=result['company_name'],
+        description=result.get('extracted_description', ''),
+        phone=result.get('extracted_phone', ''),
+        email=result.get('extracted_email', ''),
+        address=result.get('extracted_address', ''),
+        website=result['url'],
+        original_score=result.get('total_score', 0)
+    )
     
-    def _replace_between(self, content: str, start_marker: str, end_marker: str, new_content: str) -> str:
-        """Replace content between markers"""
-        start_idx = content.find(start_marker)
-        if start_idx == -1:
-            return content
-        
-        end_idx = content.find(end_marker, start_idx + len(start_marker))
-        if end_idx == -1:
-            return content
-        
-        return content[:start_idx + len(start_marker)] + "\n" + new_content + "\n" + content[end_idx:]
+    print(f"{label} Generating site for {company.name}...")
+    
+    try:
+        site_path = generator.generate_site(company)
+        print(f"    [OK] Created: {site_path}\n")
+        return {
+            'name': company.name,
+            'path': site_path,
+            'original_score': company.original_score
+        }
+    except Exception as e:
+        print(f"    [ERR] Error: {e}\n")
+        return None
 
 
-def generate_sites(analysis_results_path: str, template_path: str, output_path: str, limit: int = None):
-    """Generate sites from analysis results"""
+def generate_sites(analysis_results_path: str, template_path: str, output_path: str, limit: int = None,
+                   workers: int = None):
+    """Generate sites from analysis results, `workers` at a time (default: one per CPU)"""
     
-    # Load analysis results
-    with open(analysis_results_path, 'r', encoding='utf-8') as f:
-        results = json.load(f)
+    # Load analysis results (JSON array or JSONL); sites whose analysis failed
+    # have no extracted details to build from
+    results = list(iter_analyzed(analysis_results_path))
     
     if limit:
         results = results[:limit]
     
+    # Rows with the same slug (chains, repeated listings) would build into the same
+    # folder from different threads; keep only the last, which is what used to win
+    by_slug = {make_slug(r['company_name']): r for r in results}
+    if len(by_slug) < len(results):
+        print(f"Skipping {len(results) - len(by_slug)} duplicate companies (same folder name)")
+    results = list(by_slug.values())
+    
     generator = SiteGenerator(template_path, output_path)
-    generated = []
     
     print(f"\nGenerating {len(results)} websites...\n")
     
-    for i, result in enumerate(results, 1):
-        company = CompanyInfo(
-            name=result['company_name'],
-            description=result.get('extracted_description', ''),
-            phone=result.get('extracted_phone', ''),
-            email=result.get('extracted_email', ''),
-            address=result.get('extracted_address', ''),
-            website=result['url'],
-            original_score=result.get('total_score', 0)
-        )
-        
-        print(f"[{i}/{len(results)}] Generating site for {company.name}...")
-        
-        try:
-            site_path = generator.generate_site(company)
-            generated.append({
-                'name': company.name,
-                'path': site_path,
-                'original_score': company.original_score
-            })
-            print(f"    [OK] Created: {site_path}\n")
-        except Exception as e:
-            print(f"    [ERR] Error: {e}\n")
+    # Each site is an independent template copy plus a few rewrites; the work is
+    # file I/O (which releases the GIL), so threads overlap it without pickling
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        entries = pool.map(lambda item: _generate_one(generator, item[1], f"[{item[0]}/{len(results)}]"),
+                           enumerate(results, 1))
+        generated = [entry for entry in entries if entry is not None]
     
     # Save manifest
     manifest_path = Path(output_path) / "generated_sites.json"
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        json.dump(generated, f, indent=2)
+    dump_json(generated, manifest_path)
     
     print(f"\nGenerated {len(generated)} sites in {output_path}")
     print(f"Manifest saved to {manifest_path}")
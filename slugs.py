@@ -0,0 +1,24 @@
+"""
+Slugs
+Folder-safe names for companies, with a fast path for plain ASCII names
+"""
+
+import re
+
+from slugify import slugify
+
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+# python-slugify drops thousands separators ("1,000" -> "1000") rather than splitting on them
+_NUMBER_COMMA_RE = re.compile(r'(?<=\d),(?=\d)')
+
+
+def make_slug(name: str) -> str:
+    """Lowercase, dash-separated slug of `name`, as python-slugify would produce it.
+
+    Most company names are plain ASCII, which needs one regex pass; names with
+    accents or HTML entities (`&`) go through python-slugify's full
+    normalization.
+    """
+    if name.isascii() and '&' not in name:
+        return _SLUG_RE.sub('-', _NUMBER_COMMA_RE.sub('', name.lower())).strip('-')
+    return slugify(name)
@@ -3,16 +3,22 @@ Strategy Guide: Which companies to prioritize
 Analyzes the dataset and recommends processing order
 """
 
-import json
 from collections import Counter
 from pathlib import Path
 
+from json_io import load_json, iter_analyzed, encode_record, dump_encoded_array
+
 
 def analyze_dataset(json_path: str):
-    """Analyze the full dataset and provide strategy recommendations"""
+    """Analyze the full dataset and provide strategy recommendations.
+    
+    Returns `(companies, analyzed)`; `analyzed` is the parsed analysis_results.json
+    minus sites that failed to load, or None if there is none yet, and can be passed
+    on to generate_processing_lists.
+    """
     
-    with open(json_path, 'r', encoding='utf-8') as f:
-        companies = json.load(f)
+    companies = load_json(json_path)
+    analyzed = None
     
     print("="*70)
     print("DATASET ANALYSIS & STRATEGY RECOMMENDATIONS")
@@ -29,9 +35,10 @@ def analyze_dataset(json_path: str):
     # Score distribution (if already analyzed)
     analysis_file = Path("analysis_results.json")
     if analysis_file.exists():
-        with open(analysis_file, 'r') as f:
-            analyzed = json.load(f)
-        
+        # Unreachable sites have no score; they'd drag the average down and top the worst-first lists
+        analyzed = list(iter_analyzed(analysis_file))
+    
+    if analyzed:
         print(f"\n[CHART] SCORE DISTRIBUTION ({len(analyzed)} analyzed):")
         
         grades = Counter([c.get('grade', 'N/A') for c in analyzed])
@@ -55,28 +62,41 @@ def analyze_dataset(json_path: str):
         print(f"   [YEL] Average (60-79): {len([c for c in analyzed if 60 <= c.get('total_score', 0) < 80])} companies")
         print(f"   [GRN] Good (80+): {len(high_score)} companies")
     
-    return companies
+    return companies, analyzed
 
 
-def generate_processing_lists(json_path: str):
-    """Generate sorted lists for different strategies"""
+def generate_processing_lists(json_path: str, analyzed: list = None):
+    """Generate sorted lists for different strategies (from `analyzed` if already loaded)"""
     
-    analysis_file = Path("analysis_results.json")
-    if not analysis_file.exists():
-        print("\n[!] No analysis_results.json found. Run analyzer first!")
-        return
-    
-    with open(analysis_file, 'r') as f:
-        analyzed = json.load(f)
+    if analyzed is None:
+        analysis_file = Path("analysis_results.json")
+        if not analysis_file.exists():
+            print("\n[!] No analysis_results.json found. Run analyzer first!")
+            return
+        analyzed = list(iter_analyzed(analysis_file))
     
     print("\n" + "="*70)
     print("PROCESSING STRATEGIES")
     print("="*70)
     
+    # Sort once; every list below is a slice of this order. One pass then buckets
+    # the filtered strategies, which come out already sorted.
+    worst_first = sorted(analyzed, key=lambda x: x.get('total_score', 0))
+    best_first = worst_first[::-1]
+    with_email_sorted = []
+    high_value_sorted = []
+    for c in worst_first:
+        if c.get('extracted_email'):
+            with_email_sorted.append(c)
+        if c.get('has_online_booking') and c.get('total_score', 0) < 70:
+            high_value_sorted.append(c)
+    
+    # The four files are orderings of the same records: serialize each record once
+    encoded = {id(c): encode_record(c) for c in analyzed}
+    
     # Strategy 1: Worst First (Lowest scores)
     print("\n[1] STRATEGY 1: Worst First (Recommended for Sales)")
     print("-"*70)
-    worst_first = sorted(analyzed, key=lambda x: x.get('total_score', 0))
     print("   Top 10 companies needing help most:")
     for i, c in enumerate(worst_first[:10], 1):
         score = c.get('total_score', 0)
@@ -84,14 +104,12 @@ def generate_processing_lists(json_path: str):
         print(f"   {i:>2}. {c['company_name'][:35]:<35} | {score:>3}/100 ({grade})")
     
     # Save worst first list
-    with open('strategy_worst_first.json', 'w') as f:
-        json.dump(worst_first, f, indent=2)
+    dump_encoded_array((encoded[id(c)] for c in worst_first), 'strategy_worst_first.json')
     print(f"   [SAVED] Saved to: strategy_worst_first.json")
     
     # Strategy 2: Best First
     print("\n[2] STRATEGY 2: Best First (Good References)")
     print("-"*70)
-    best_first = sorted(analyzed, key=lambda x: x.get('total_score', 0), reverse=True)
     print("   Top 10 best websites (for reference):")
     for i, c in enumerate(best_first[:10], 1):
         score = c.get('total_score', 0)
@@ -99,41 +117,33 @@ def generate_processing_lists(json_path: str):
         email = c.get('extracted_email', '')
         print(f"   {i:>2}. {c['company_name'][:35]:<35} | {score:>3}/100 ({grade}) | {email[:25]}")
     
-    with open('strategy_best_first.json', 'w') as f:
-        json.dump(best_first, f, indent=2)
+    dump_encoded_array((encoded[id(c)] for c in best_first), 'strategy_best_first.json')
     print(f"   [SAVED] Saved to: strategy_best_first.json")
     
     # Strategy 3: With Email (Contactable)
     print("\n[3] STRATEGY 3: Has Email (Easy to contact)")
     print("-"*70)
-    with_email = [c for c in analyzed if c.get('extracted_email')]
-    with_email_sorted = sorted(with_email, key=lambda x: x.get('total_score', 0))
-    print(f"   {len(with_email)} companies have email addresses")
+    print(f"   {len(with_email_sorted)} companies have email addresses")
     print("   Top 10 contactable companies with low scores:")
     for i, c in enumerate(with_email_sorted[:10], 1):
         score = c.get('total_score', 0)
         email = c.get('extracted_email', '')
         print(f"   {i:>2}. {c['company_name'][:30]:<30} | {score:>3}/100 | {email[:30]}")
     
-    with open('strategy_with_email.json', 'w') as f:
-        json.dump(with_email_sorted, f, indent=2)
+    dump_encoded_array((encoded[id(c)] for c in with_email_sorted), 'strategy_with_email.json')
     print(f"   [SAVED] Saved to: strategy_with_email.json")
     
     # Strategy 4: High Value (Low score + Has booking)
     print("\n[4] STRATEGY 4: High Value Prospects")
     print("-"*70)
     print("   Criteria: Has online booking BUT low score")
-    high_value = [c for c in analyzed 
-                  if c.get('has_online_booking') and c.get('total_score', 0) < 70]
-    high_value_sorted = sorted(high_value, key=lambda x: x.get('total_score', 0))
-    print(f"   Found {len(high_value)} high-value prospects")
+    print(f"   Found {len(high_value_sorted)} high-value prospects")
     for i, c in enumerate(high_value_sorted[:10], 1):
         score = c.get('total_score', 0)
         email = c.get('extracted_email', 'No email')
         print(f"   {i:>2}. {c['company_name'][:30]:<30} | {score:>3}/100 | {email}")
     
-    with open('strategy_high_value.json', 'w') as f:
-        json.dump(high_value_sorted, f, indent=2)
+    dump_encoded_array((encoded[id(c)] for c in high_value_sorted), 'strategy_high_value.json')
     print(f"   [SAVED] Saved to: strategy_high_value.json")
     
     # Recommendation
@@ -176,7 +186,7 @@ if __name__ == "__main__":
     dataset = "../dataset_crawler-google-places_2026-01-22_05-33-25-536.json"
     
     # Analyze
-    analyze_dataset(dataset)
+    companies, analyzed = analyze_dataset(dataset)
     
-    # Generate strategies
-    generate_processing_lists(dataset)
+    # Generate strategies (reusing the analysis results parsed above)
+    generate_processing_lists(dataset, analyzed)
@@ -1,11 +1,20 @@
 """
 Visual Comparison Recorder
-Captures screenshots of old vs new websites and creates comparison GIFs/videos
+Captures screenshots of old vs new websites and creates comparison pages, GIFs and videos
 """
 
 import asyncio
+import functools
+import html
+import io
 import json
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from string import Template
 from typing import List, Dict, Tuple
 from dataclasses import dataclass
 
@@ -21,6 +30,174 @@ except ImportError:
     print("Pillow not installed. Run: pip install pillow")
     raise
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from context_pool import ContextPool
+from page_ready import wait_until_settled
+from worker_pool import process_stream, run
+
+
+# Browser contexts kept warm for captures (each capture opens one page in one)
+CONTEXT_POOL_SIZE = 4
+# Captures per context before it is closed and replaced with a fresh one
+CONTEXT_MAX_USES = 20
+# Sites recorded at once (each captures its pages one after the other)
+MAX_CONCURRENT_RECORDINGS = 4
+# Manifests larger than this are sharded across processes unless jobs is given
+SHARD_MIN_SITES = 100
+
+# ffmpeg encodes the comparison MP4s and GIFs (one shared palette, much smaller
+# files); without it only a GIF is made, with Pillow's encoder
+FFMPEG = shutil.which('ffmpeg')
+GIF_FILTER = 'split[s0][s1];[s0]palettegen=max_colors=128[p];[s1][p]paletteuse=dither=bayer'
+
+# Scrolls through the page (200px per animation frame, no further than maxHeight)
+# to trigger lazy loading, back to the top, gives fonts requested by the revealed
+# content up to 1s, and returns the page height
+SCROLL_AND_MEASURE_JS = """async (maxHeight) => {
+    await new Promise((resolve) => {
+        let totalHeight = 0;
+        const distance = 200;
+        const step = () => {
+            window.scrollBy(0, distance);
+            totalHeight += distance;
+            if (totalHeight >= Math.min(document.body.scrollHeight, maxHeight)) {
+                window.scrollTo(0, 0);
+                resolve();
+            } else {
+                requestAnimationFrame(step);
+            }
+        };
+        requestAnimationFrame(step);
+    });
+    await Promise.race([document.fonts.ready, new Promise((resolve) => setTimeout(resolve, 1000))]);
+    return document.body.scrollHeight;
+}"""
+
+# Characters dropped from company names to make file names (same set as str.isalnum plus ' ', '-', '_')
+_SLUG_RE = re.compile(r'[^\w -]+')
+
+# Before/after page: the BEFORE image sits on top of the AFTER image and fades
+# in and out, so the browser animates the two JPEGs with no encoding here
+HTML_COMPARISON_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { margin: 0; background: #1a1a1a; }
+.compare { display: grid; max-width: 1280px; margin: 0 auto; }
+.compare img { grid-area: 1 / 1; width: 100%; height: auto; }
+.compare .before { animation: fade 4s infinite; }
+@keyframes fade { 0%, 45% { opacity: 1; } 50%, 95% { opacity: 0; } 100% { opacity: 1; } }
+</style>
+</head>
+<body>
+<div class="compare">
+<img class="after" src="$new" alt="After">
+<img class="before" src="$old" alt="Before">
+</div>
+</body>
+</html>
+""")
+
+# Marks placeholder screenshots (JPEG comment) so reruns capture those sites again
+PLACEHOLDER_COMMENT = b'visual_recorder placeholder'
+
+# Requests on the old (live) site that never show up in a screenshot. Images and
+# fonts are kept: they change what the page looks like.
+BLOCKED_RESOURCE_TYPES = {'media', 'websocket', 'manifest'}
+BLOCKED_DOMAINS = ('googletagmanager', 'google-analytics', 'doubleclick', 'facebook.net', 'hotjar',
+                   'intercom', 'segment.io')
+
+# Pages are captured as viewport-sized tiles and stitched, rather than by growing
+# the viewport to the whole page (one huge surface for Chromium to rasterize)
+TILE_HEIGHT = 1600
+MAX_CAPTURE_HEIGHT = 4000
+
+# Height of the label banner drawn into the page above the content
+LABEL_HEIGHT = 40
+
+# Puts a dark label banner at the top of the document and pushes the content below
+# it, so the screenshot comes out of Chrome already labelled
+LABEL_BANNER_JS = """(label) => {
+    const banner = document.createElement('div');
+    banner.textContent = label;
+    banner.style.cssText = 'position:absolute;top:0;left:0;width:100%;height:40px;margin:0;padding:0;' +
+        'background:#1a1a1a;color:#fff;font:24px/40px Arial,sans-serif;text-align:center;' +
+        'z-index:2147483647';
+    document.documentElement.insertBefore(banner, document.body);
+    document.body.style.marginTop = '40px';
+}"""
+
+# Scrolls to a tile and returns where the page actually scrolled to (the last tile
+# stops short when the page ends)
+SCROLL_TO_JS = "(y) => { window.scrollTo(0, y); return window.scrollY; }"
+
+# Hides fixed and sticky elements (headers, chat widgets) so they are only in the first tile
+HIDE_FIXED_JS = """() => {
+    for (const el of document.body.querySelectorAll('*')) {
+        const position = getComputedStyle(el).position;
+        if (position === 'fixed' || position === 'sticky') {
+            el.style.visibility = 'hidden';
+        }
+    }
+}"""
+
+
+async def _block_noise(route):
+    """Abort trackers, chat widgets and media so live pages settle sooner"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(d in request.url for d in BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _up_to_date(path: Path, *sources: Path) -> bool:
+    """True if `path` exists and is no older than any of `sources`"""
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return all(mtime >= source.stat().st_mtime for source in sources)
+
+
+def _is_capture(path: Path) -> bool:
+    """True if `path` holds a real screenshot (not missing, not a placeholder)"""
+    if not path.exists():
+        return False
+    try:
+        # Header only: captures are moved into place complete (see _capture_screenshot)
+        with Image.open(path) as img:
+            return img.info.get('comment') != PLACEHOLDER_COMMENT
+    except OSError:
+        return False  # Not an image at all
+
+
+@functools.lru_cache(maxsize=8)
+def _get_font(size: int):
+    """Arial at `size` (Pillow's default font if unavailable), loaded once per size"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _fit(img: Image.Image, size: Tuple[int, int], resample) -> Image.Image:
+    """`img` resized to `size`, untouched if it already matches.
+    
+    A still-undecoded JPEG is first drafted, so libjpeg can hand back a
+    pre-scaled image when `size` is half the original or smaller.
+    """
+    if img.size == size:
+        return img
+    img.draft('RGB', size)
+    return img.resize(size, resample)
+
 
 @dataclass
 class ComparisonConfig:
@@ -29,160 +206,196 @@ class ComparisonConfig:
     new_url: str  # Local dev server URL
     company_name: str
     output_dir: str
+    emit_mp4: bool = False  # Also encode a video (needs ffmpeg; main.py --mp4)
+    emit_gif: bool = False  # Also encode a GIF (main.py --gif; made instead of the MP4 if that fails)
     
 
 class VisualRecorder:
     """Records and compares website screenshots"""
     
-    def __init__(self):
-        self.browser: Browser = None
+    def __init__(self, browser: Browser = None, pool_size: int = CONTEXT_POOL_SIZE):
+        # Pass a browser to share one with the caller; otherwise init() launches one
+        self.browser: Browser = browser
+        self._owns_browser = browser is None
+        self.playwright = None
+        self.pool_size = pool_size
+        self.pool: ContextPool = None
         
     async def init(self):
-        """Initialize browser"""
+        """Initialize browser and the context pool that captures draw from"""
         if not self.browser:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=True)
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True)
+        if not self.pool:
+            self.pool = ContextPool(self.browser, self.pool_size, max_uses=CONTEXT_MAX_USES,
+                                    viewport={'width': 1280, 'height': TILE_HEIGHT})
     
     async def close(self):
-        """Close browser"""
-        if self.browser:
+        """Close pooled contexts, and the browser if this recorder launched it"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        if self.browser and self._owns_browser:
             await self.browser.close()
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
     
-    async def capture_comparison(self, config: ComparisonConfig) -> Dict[str, str]:
-        """Capture old vs new website screenshots"""
+    async def capture_comparison(self, config: ComparisonConfig, force: bool = False) -> Dict[str, str]:
+        """Capture old vs new website screenshots.
+        
+        Outputs left by an earlier run are reused: screenshots unless they are
+        placeholders, derived images unless older than the screenshots. Pass
+        `force=True` to redo everything.
+        """
         
         output_path = Path(config.output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        safe_name = "".join(c for c in config.company_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_name = safe_name.replace(' ', '-').lower()
+        safe_name = _SLUG_RE.sub('', config.company_name).rstrip().replace(' ', '-').lower()
         
         results = {}
         
-        # Capture old website
-        print(f"  Capturing OLD website: {config.old_url}")
-        old_screenshot = await self._capture_screenshot(
-            config.old_url, 
-            output_path / f"{safe_name}_old.png",
-            label="BEFORE (Original)"
-        )
+        # Capture old website (unless an earlier run already did)
+        old_screenshot = output_path / f"{safe_name}_old.jpg"
+        if force or not _is_capture(old_screenshot):
+            print(f"  Capturing OLD website: {config.old_url}")
+            await self._capture_screenshot(
+                config.old_url, 
+                old_screenshot,
+                label="BEFORE (Original)",
+                block_noise=True
+            )
         results['old_screenshot'] = str(old_screenshot)
         
         # Capture new website (if URL provided)
         if config.new_url:
-            print(f"  Capturing NEW website: {config.new_url}")
-            new_screenshot = await self._capture_screenshot(
-                config.new_url,
-                output_path / f"{safe_name}_new.png",
-                label="AFTER (Redesigned)"
-            )
+            new_screenshot = output_path / f"{safe_name}_new.jpg"
+            if force or not _is_capture(new_screenshot):
+                print(f"  Capturing NEW website: {config.new_url}")
+                await self._capture_screenshot(
+                    config.new_url,
+                    new_screenshot,
+                    label="AFTER (Redesigned)"
+                )
             results['new_screenshot'] = str(new_screenshot)
             
             # Create side-by-side comparison
-            comparison_path = await self._create_side_by_side(
-                old_screenshot, new_screenshot, 
-                output_path / f"{safe_name}_comparison.png",
-                config.company_name
-            )
+            comparison_path = output_path / f"{safe_name}_comparison.jpg"
+            if force or not _up_to_date(comparison_path, old_screenshot, new_screenshot):
+                await asyncio.to_thread(
+                    self._create_side_by_side,
+                    old_screenshot, new_screenshot, 
+                    comparison_path,
+                    config.company_name
+                )
             results['comparison'] = str(comparison_path)
             
+            # Create the animated before/after page (the browser does the animating)
+            html_path = output_path / f"{safe_name}_comparison.html"
+            if force or not html_path.exists():
+                self._create_html_comparison(old_screenshot, new_screenshot, html_path, config.company_name)
+            results['html'] = str(html_path)
+            
+            # Create before/after video (a fraction of the GIF's size)
+            mp4_path = None
+            if config.emit_mp4 and FFMPEG:
+                mp4_path = output_path / f"{safe_name}_comparison.mp4"
+                if force or not _up_to_date(mp4_path, old_screenshot, new_screenshot):
+                    mp4_path = await asyncio.to_thread(
+                        self._create_mp4_comparison,
+                        [old_screenshot, new_screenshot],
+                        mp4_path
+                    )
+            if mp4_path:
+                results['mp4'] = str(mp4_path)
+            
             # Create animated GIF
-            gif_path = await self._create_animated_gif(
-                [old_screenshot, new_screenshot],
-                output_path / f"{safe_name}_animated.gif"
-            )
-            results['animated_gif'] = str(gif_path)
+            if config.emit_gif or (config.emit_mp4 and not mp4_path):
+                gif_path = output_path / f"{safe_name}_animated.gif"
+                if force or not _up_to_date(gif_path, old_screenshot, new_screenshot):
+                    await asyncio.to_thread(
+                        self._create_animated_gif,
+                        [old_screenshot, new_screenshot],
+                        gif_path
+                    )
+                results['animated_gif'] = str(gif_path)
         
         return results
     
-    async def _capture_screenshot(self, url: str, output_file: Path, label: str = None) -> Path:
+    async def _capture_screenshot(self, url: str, output_file: Path, label: str = None,
+                                  block_noise: bool = False) -> Path:
         """Capture a full-page screenshot with optional label"""
         
-        page = await self.browser.new_page(viewport={'width': 1280, 'height': 800})
+        # Written under a temporary name and moved into place once complete, so a
+        # crash mid-write never leaves a truncated file that a rerun would reuse
+        partial = output_file.with_name(f"{output_file.stem}.part{output_file.suffix}")
+        
+        # A fresh page in a warm pooled context, rather than a new context per capture
+        context = await self.pool.acquire()
+        page = None
         
         try:
-            # Navigate to page
-            await page.goto(url, wait_until='networkidle', timeout=30000)
-            
-            # Wait for content to load
-            await page.wait_for_timeout(2000)
+            page = await context.new_page()
+            if block_noise:
+                # Per page, not per context: pooled contexts also load the local dev server
+                await page.route("**/*", _block_noise)
             
-            # Scroll to trigger lazy loading
-            await page.evaluate("""async () => {
-                await new Promise((resolve) => {
-                    let totalHeight = 0;
-                    const distance = 100;
-                    const timer = setInterval(() => {
-                        const scrollHeight = document.body.scrollHeight;
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-                        
-                        if (totalHeight >= scrollHeight) {
-                            clearInterval(timer);
-                            window.scrollTo(0, 0);
-                            resolve();
-                        }
-                    }, 50);
-                });
-            }""")
-            
-            await page.wait_for_timeout(1000)
-            
-            # Get full page height
-            height = await page.evaluate('() => document.body.scrollHeight')
+            # Navigate to page
+            await page.goto(url, wait_until='domcontentloaded', timeout=15000)
             
-            # Set viewport to capture full page (up to 4000px max)
-            capture_height = min(height, 4000)
-            await page.set_viewport_size({'width': 1280, 'height': capture_height})
+            # Wait (briefly) for content to settle instead of for networkidle plus a fixed 2s
+            await wait_until_settled(page, max_wait_ms=5000)
             
-            # Take screenshot
-            await page.screenshot(path=str(output_file), full_page=False)
+            # Scroll to trigger lazy loading, then get full page height (one round-trip)
+            height = await page.evaluate(SCROLL_AND_MEASURE_JS, MAX_CAPTURE_HEIGHT)
             
-            # Add label if provided
+            # Capture the page (up to MAX_CAPTURE_HEIGHT), plus the label banner
+            capture_height = min(height, MAX_CAPTURE_HEIGHT)
             if label:
-                await self._add_label_to_image(output_file, label)
+                await page.evaluate(LABEL_BANNER_JS, label)
+                capture_height += LABEL_HEIGHT
+            
+            if capture_height <= TILE_HEIGHT:
+                # One tile: Chrome encodes the labelled JPEG straight to disk
+                clip = {'x': 0, 'y': 0, 'width': 1280, 'height': capture_height}
+                await page.screenshot(path=str(partial), type='jpeg', quality=85, clip=clip)
+            else:
+                tiles = []
+                for offset in range(0, capture_height, TILE_HEIGHT):
+                    if offset == TILE_HEIGHT:
+                        await page.evaluate(HIDE_FIXED_JS)
+                    y = await page.evaluate(SCROLL_TO_JS, offset)
+                    # PNG tiles, so the stitched page goes through JPEG compression only once
+                    tiles.append((y, await page.screenshot(type='png')))
+                await asyncio.to_thread(self._stitch_tiles, tiles, capture_height, partial)
             
         except Exception as e:
             print(f"    Warning: Error capturing {url}: {e}")
             # Create placeholder image on error
-            await self._create_placeholder_image(output_file, label or "Error")
-        
-        await page.close()
+            await asyncio.to_thread(self._create_placeholder_image, partial, label or "Error")
+        finally:
+            # The context goes back to the pool even if the page couldn't be opened or closed
+            try:
+                if page is not None:
+                    await page.close()
+            finally:
+                await self.pool.release(context)
+        
+        os.replace(partial, output_file)
         return output_file
     
-    async def _add_label_to_image(self, image_path: Path, label: str):
-        """Add a label banner to the top of the image"""
-        
-        img = Image.open(image_path)
-        draw = ImageDraw.Draw(img)
-        
-        # Banner height
-        banner_height = 40
+    def _stitch_tiles(self, tiles: List[Tuple[int, bytes]], height: int, output_file: Path):
+        """Paste (scroll offset, PNG bytes) tiles into one image and save it as JPEG"""
         
-        # Create new image with banner
-        new_img = Image.new('RGB', (img.width, img.height + banner_height), '#1a1a1a')
-        new_img.paste(img, (0, banner_height))
-        
-        draw = ImageDraw.Draw(new_img)
-        
-        # Add text
-        try:
-            font = ImageFont.truetype("arial.ttf", 24)
-        except:
-            font = ImageFont.load_default()
-        
-        # Center text
-        bbox = draw.textbbox((0, 0), label, font=font)
-        text_width = bbox[2] - bbox[0]
-        x = (img.width - text_width) // 2
-        y = (banner_height - (bbox[3] - bbox[1])) // 2
-        
-        draw.text((x, y), label, fill='white', font=font)
-        
-        new_img.save(image_path, quality=90)
+        page_img = Image.new('RGB', (1280, height), 'white')
+        for y, data in tiles:
+            page_img.paste(Image.open(io.BytesIO(data)), (0, y))
+        page_img.save(output_file, quality=85)
     
-    async def _create_side_by_side(self, old_img_path: Path, new_img_path: Path, 
-                                   output_path: Path, company_name: str) -> Path:
+    def _create_side_by_side(self, old_img_path: Path, new_img_path: Path, 
+                             output_path: Path, company_name: str) -> Path:
         """Create side-by-side comparison image"""
         
         old_img = Image.open(old_img_path)
@@ -197,23 +410,18 @@ class VisualRecorder:
         old_new_height = min(max_height, old_img.height)
         new_new_height = min(max_height, new_img.height)
         
-        old_img = old_img.resize((int(old_new_height * old_ratio), old_new_height), Image.Resampling.LANCZOS)
-        new_img = new_img.resize((int(new_new_height * new_ratio), new_new_height), Image.Resampling.LANCZOS)
+        old_img = _fit(old_img, (int(old_new_height * old_ratio), old_new_height), Image.Resampling.LANCZOS)
+        new_img = _fit(new_img, (int(new_new_height * new_ratio), new_new_height), Image.Resampling.LANCZOS)
         
         # Create combined image
         total_width = old_img.width + new_img.width + 20  # 20px gap
         max_h = max(old_img.height, new_img.height)
         
-        combined = Image.new('RGB', (total_width, max_h + 60), '#f5f5f5')  # Extra for header
-        
-        # Add header
-        draw = ImageDraw.Draw(combined)
-        try:
-            font = ImageFont.truetype("arial.ttf", 28)
-            small_font = ImageFont.truetype("arial.ttf", 16)
-        except:
-            font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
+        # Header band
+        header = Image.new('RGB', (total_width, 60), '#f5f5f5')
+        draw = ImageDraw.Draw(header)
+        font = _get_font(28)
+        small_font = _get_font(16)
         
         # Title
         title = f"{company_name} - Website Transformation"
@@ -225,24 +433,102 @@ class VisualRecorder:
         draw.text((old_img.width // 2 - 40, 50), "BEFORE", fill='#666666', font=small_font)
         draw.text((old_img.width + 20 + new_img.width // 2 - 30, 50), "AFTER", fill='#059669', font=small_font)
         
-        # Paste images
-        combined.paste(old_img, (0, 60))
-        combined.paste(new_img, (old_img.width + 20, 60))
+        old_img = old_img if old_img.mode == 'RGB' else old_img.convert('RGB')
+        new_img = new_img if new_img.mode == 'RGB' else new_img.convert('RGB')
+        if np is not None:
+            # One background fill and a straight copy of each part, no Pillow blits
+            canvas = np.full((max_h + 60, total_width, 3), 0xf5, dtype=np.uint8)
+            canvas[:60] = np.asarray(header)
+            canvas[60:60 + old_img.height, :old_img.width] = np.asarray(old_img)
+            canvas[60:60 + new_img.height, old_img.width + 20:] = np.asarray(new_img)
+            combined = Image.fromarray(canvas)
+        else:
+            combined = Image.new('RGB', (total_width, max_h + 60), '#f5f5f5')
+            combined.paste(header, (0, 0))
+            combined.paste(old_img, (0, 60))
+            combined.paste(new_img, (old_img.width + 20, 60))
         
         # Save
         combined.save(output_path, quality=90)
         return output_path
     
-    async def _create_animated_gif(self, image_paths: List[Path], output_path: Path, 
-                                   duration: int = 2000) -> Path:
-        """Create animated GIF switching between images"""
+    def _create_html_comparison(self, old_img_path: Path, new_img_path: Path,
+                                output_path: Path, company_name: str) -> Path:
+        """Write a page that crossfades between the screenshots (linked relative to it)"""
+        
+        page = HTML_COMPARISON_TEMPLATE.substitute(
+            title=html.escape(f"{company_name} - Before / After"),
+            old=html.escape(old_img_path.name),
+            new=html.escape(new_img_path.name)
+        )
+        output_path.write_text(page, encoding='utf-8')
+        return output_path
+    
+    def _load_frames(self, image_paths: List[Path]) -> List[Image.Image]:
+        """Screenshots resized to animation frames"""
         
         images = []
         for path in image_paths:
-            img = Image.open(path)
-            # Resize to consistent size
-            img = img.resize((1280, min(img.height, 2000)), Image.Resampling.LANCZOS)
-            images.append(img.convert('RGB'))
+            with Image.open(path) as img:
+                # Decode as RGB up front (a no-op for our JPEGs) rather than converting afterwards
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                # Resize to consistent size (BILINEAR: animation frames are previews)
+                frame = _fit(img, (1280, min(img.height, 2000)), Image.Resampling.BILINEAR)
+                frame.load()
+            images.append(frame)
+        return images
+    
+    def _pipe_to_ffmpeg(self, images: List[Image.Image], duration: int, output_args: List[str]):
+        """Feed frames to ffmpeg as raw RGB on stdin, one every `duration` ms.
+        
+        Frames are padded at the bottom to one even size (rawvideo needs equal
+        frames, yuv420p even dimensions), so nothing is written to disk first.
+        """
+        width = max(img.width for img in images)
+        height = max(img.height for img in images)
+        size = (width + width % 2, height + height % 2)
+        raw = bytearray()
+        for img in images:
+            if img.size != size:
+                canvas = Image.new('RGB', size, 'white')
+                canvas.paste(img, (0, 0))
+                img = canvas
+            raw += img.tobytes()
+        subprocess.run(
+            [FFMPEG, '-y', '-loglevel', 'error',
+             '-f', 'rawvideo', '-pixel_format', 'rgb24', '-video_size', f"{size[0]}x{size[1]}",
+             '-framerate', f"{1000 / duration:g}", '-i', 'pipe:0', *output_args],
+            input=bytes(raw), check=True, capture_output=True
+        )
+    
+    def _create_mp4_comparison(self, image_paths: List[Path], output_path: Path,
+                               duration: int = 2000) -> Path:
+        """Create an H.264 video switching between images; None if ffmpeg fails"""
+        
+        try:
+            self._pipe_to_ffmpeg(self._load_frames(image_paths), duration, [
+                '-r', '25',  # Players cope badly with sub-1fps video; repeat frames instead
+                '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-preset', 'veryfast',
+                '-movflags', '+faststart', str(output_path)
+            ])
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"    Warning: ffmpeg MP4 encoding failed: {e}")
+            return None
+        return output_path
+    
+    def _create_animated_gif(self, image_paths: List[Path], output_path: Path, 
+                             duration: int = 2000) -> Path:
+        """Create animated GIF switching between images"""
+        
+        images = self._load_frames(image_paths)
+        
+        if FFMPEG:
+            try:
+                self._pipe_to_ffmpeg(images, duration, ['-vf', GIF_FILTER, '-loop', '0', str(output_path)])
+                return output_path
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"    Warning: ffmpeg GIF encoding failed, using Pillow: {e}")
         
         # Save as GIF
         images[0].save(
@@ -255,16 +541,12 @@ class VisualRecorder:
         
         return output_path
     
-    async def _create_placeholder_image(self, output_path: Path, text: str):
+    def _create_placeholder_image(self, output_path: Path, text: str):
         """Create a placeholder image when screenshot fails"""
         
         img = Image.new('RGB', (1280, 800), '#f3f4f6')
         draw = ImageDraw.Draw(img)
-        
-        try:
-            font = ImageFont.truetype("arial.ttf", 32)
-        except:
-            font = ImageFont.load_default()
+        font = _get_font(32)
         
         bbox = draw.textbbox((0, 0), text, font=font)
         text_width = bbox[2] - bbox[0]
@@ -274,44 +556,88 @@ class VisualRecorder:
         y = (800 - text_height) // 2
         
         draw.text((x, y), text, fill='#6b7280', font=font)
-        img.save(output_path)
+        img.save(output_path, quality=85, comment=PLACEHOLDER_COMMENT)
 
 
-async def record_comparisons(manifest_path: str, output_dir: str, dev_server_base: str = "http://localhost:3000"):
-    """Record comparisons for all generated sites"""
-    
-    # Load manifest
-    with open(manifest_path, 'r', encoding='utf-8') as f:
-        sites = json.load(f)
+async def _record_sites(sites: List[Dict], output_dir: str, dev_server_base: str, force: bool,
+                        emit_mp4: bool = False, emit_gif: bool = False,
+                        first: int = 1, total: int = None) -> List[Dict]:
+    """Record `sites` with one recorder (browser); progress counts from `first` of `total`"""
     
+    total = total or len(sites)
     recorder = VisualRecorder()
     await recorder.init()
     
-    results = []
-    
-    print(f"\nRecording {len(sites)} visual comparisons...\n")
-    
-    for i, site in enumerate(sites, 1):
-        print(f"[{i}/{len(sites)}] Recording {site['name']}...")
+    async def record_one(i: int, site: Dict):
+        print(f"[{first + i - 1}/{total}] Recording {site['name']}...")
         
         config = ComparisonConfig(
             old_url=site.get('website', ''),
             new_url=f"{dev_server_base}/{Path(site['path']).name}",
             company_name=site['name'],
-            output_dir=output_dir
+            output_dir=output_dir,
+            emit_mp4=emit_mp4,
+            emit_gif=emit_gif
         )
         
         try:
-            result = await recorder.capture_comparison(config)
-            results.append({
+            result = await recorder.capture_comparison(config, force=force)
+            print(f"    ✓ Comparison saved: {site['name']}\n")
+            return {
                 'name': site['name'],
                 **result
-            })
-            print(f"    ✓ Comparison saved\n")
+            }
         except Exception as e:
-            print(f"    ✗ Error: {e}\n")
+            print(f"    ✗ Error ({site['name']}): {e}\n")
+            return None
+    
+    try:
+        return await process_stream(sites, record_one, concurrency=MAX_CONCURRENT_RECORDINGS)
+    finally:
+        await recorder.close()
+
+
+def _record_shard(sites: List[Dict], output_dir: str, dev_server_base: str, force: bool,
+                  emit_mp4: bool, emit_gif: bool, first: int, total: int) -> List[Dict]:
+    """Entry point of a shard process: its own event loop and browser"""
+    return run(_record_sites(sites, output_dir, dev_server_base, force, emit_mp4, emit_gif, first, total))
+
+
+async def record_comparisons(manifest_path: str, output_dir: str, dev_server_base: str = "http://localhost:3000",
+                             force: bool = False, jobs: int = None, emit_mp4: bool = False,
+                             emit_gif: bool = False):
+    """Record comparisons for all generated sites (resuming unless `force`).
+    
+    Every site gets a screenshot pair, a side-by-side image and an animated
+    HTML page; `emit_mp4` adds a video (needs ffmpeg) and `emit_gif` a GIF.
+    
+    Large manifests (over SHARD_MIN_SITES) are split across `jobs` processes,
+    each with its own browser, so image work isn't serialized on one GIL.
+    `jobs` defaults to half the CPUs; pass 1 to stay in this process.
+    """
+    
+    # Load manifest
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        sites = json.load(f)
+    
+    print(f"\nRecording {len(sites)} visual comparisons...\n")
+    
+    if jobs is None:
+        jobs = max(1, (os.cpu_count() or 2) // 2) if len(sites) > SHARD_MIN_SITES else 1
     
-    await recorder.close()
+    if jobs > 1:
+        # Contiguous shards, so concatenating their results keeps manifest order
+        size = -(-len(sites) // jobs)
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            shards = await asyncio.gather(*(
+                loop.run_in_executor(pool, _record_shard, sites[start:start + size], output_dir,
+                                     dev_server_base, force, emit_mp4, emit_gif, start + 1, len(sites))
+                for start in range(0, len(sites), size)
+            ))
+        results = [result for shard in shards for result in shard]
+    else:
+        results = await _record_sites(sites, output_dir, dev_server_base, force, emit_mp4, emit_gif)
     
     # Save results
     results_path = Path(output_dir) / "comparison_results.json"
@@ -0,0 +1,52 @@
+"""
+Worker Pool
+Runs an async handler over a stream of items with a fixed number of workers
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Coroutine, Iterable, List, Optional
+
+try:
+    import uvloop  # Not available on Windows
+except ImportError:
+    uvloop = None
+
+
+def run(main: Coroutine) -> Any:
+    """`asyncio.run`, on uvloop's faster event loop when it is installed"""
+    if uvloop is not None:
+        return uvloop.run(main)
+    return asyncio.run(main)
+
+
+async def process_stream(items: Iterable, handler: Callable[[int, Any], Awaitable[Optional[Any]]],
+                         concurrency: int) -> List[Any]:
+    """Call `handler(index, item)` for every item, `concurrency` at a time.
+    
+    Items are pulled lazily through a bounded queue, so only a few are held in
+    memory at once. Returns the non-None handler results in input order.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = []
+    
+    async def producer():
+        for indexed in enumerate(items, 1):
+            await queue.put(indexed)
+        for _ in range(concurrency):
+            await queue.put(None)  # One stop signal per worker
+    
+    async def worker():
+        while (indexed := await queue.get()) is not None:
+            result = await handler(*indexed)
+            if result is not None:
+                results.append((indexed[0], result))
+    
+    tasks = [asyncio.ensure_future(producer())] + [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # If a handler raised, stop the producer and the other workers too
+        for task in tasks:
+            task.cancel()
+    results.sort(key=lambda r: r[0])
+    return [result for _, result in results]